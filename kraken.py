@@ -1,34 +1,204 @@
-from text_extraction import PDFLineExtractor
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import text_extraction
+import structure_analysis
+from text_extraction import PDFLineExtractor, PAGE_CHUNK_SIZE
 from structure_analysis import classify_headings
 
+# Bump when the extraction/classification output changes so that stale
+# cache entries are not served.
+CACHE_VERSION = 5
+
+# PDF readers accept the header anywhere in the first 1024 bytes
+PDF_MAGIC = b'%PDF-'
+PDF_HEADER_WINDOW = 1024
+
+
+@dataclass(frozen=True)
+class DeferredDocument:
+    """A long document left for extract_deferred, returned over max_pages.
+
+    Carries what was learned while opening the file, so the caller can
+    extract it in chunks without reading or hashing it again.
+    """
+    page_count: int
+    cache_path: Optional[str] = None
+
 
-def extract_outline(pdf_path: str) -> dict:
+def extract_outline(pdf_path: str, cache_dir: Optional[str] = None,
+                    executor: Optional[Executor] = None,
+                    max_pages: Optional[int] = None) -> Union[dict, DeferredDocument]:
     """
     Extracts title and hierarchical outline (H1–H4) from a PDF.
-    
+
     Args:
         pdf_path (str): Path to the PDF file.
+        cache_dir (str, optional): Directory for outlines cached by file
+            content hash. Caching is disabled when not given.
+        executor (Executor, optional): Pool used to extract page chunks of
+            long documents in parallel.
+        max_pages (int, optional): When given, uncached documents with more
+            pages are left unprocessed and a DeferredDocument is returned, so
+            that pool workers can hand long documents back for chunked
+            extraction with extract_deferred.
     Returns:
         dict: {
             "title": <str>,
             "outline": [{"level": "H1"/"H2"/"H3"/"H4", "text": <str>, "page": <int>}, ...]
         }
     """
+    # Files that cannot be read raise, so the caller reports them and
+    # writes no output for them
+    data = read_pdf(pdf_path)
+    return extract_outline_from_bytes(data, cache_dir, executor, pdf_path, max_pages)
+
+
+def extract_outline_from_bytes(data: bytes, cache_dir: Optional[str] = None,
+                               executor: Optional[Executor] = None,
+                               pdf_path: Optional[str] = None,
+                               max_pages: Optional[int] = None) -> Union[dict, DeferredDocument]:
+    """
+    Extracts title and hierarchical outline from PDF contents already in memory.
+
+    Args:
+        data (bytes): Raw PDF file contents.
+        cache_dir (str, optional): See extract_outline.
+        executor (Executor, optional): See extract_outline. Only used when
+            pdf_path is given, since workers reopen the file from disk.
+        pdf_path (str, optional): Path the contents were read from.
+        max_pages (int, optional): See extract_outline.
+    Returns:
+        dict: Same structure as extract_outline, or a DeferredDocument for
+            a document over max_pages.
+    """
+    # Reject non-PDF input before any parsing work
+    if PDF_MAGIC not in data[:PDF_HEADER_WINDOW]:
+        return _empty_outline()
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{_content_key(data)}.json")
+        cached = _load_cached(cache_path)
+        if cached is not None:
+            return cached
+
     try:
-        # Extract text lines with formatting metadata
-        extractor = PDFLineExtractor(pdf_path)
-        extractor.extract_text_lines()
-        
-        # Get formatted data for processing
-        json_data = extractor.get_pdf_lines(include_metadata=True)
-        
-        # Classify headings and extract structure
-        result = classify_headings(json_data)
-        
-        return {
-            "title": result.get("title", ""),
-            "outline": result.get("outline", [])
-        }
-        
-    except Exception:
-        return {"title": "", "outline": []}
\ No newline at end of file
+        # Extract text lines with formatting metadata. The extracted lines
+        # already carry every field the classifier reads, so they are passed
+        # on directly rather than copied through get_pdf_lines().
+        # The document is closed as soon as its lines are extracted, so it
+        # is not held open during classification.
+        with PDFLineExtractor(pdf_path, data=data) as extractor:
+            page_count = extractor.doc.page_count
+            if page_count == 0:
+                return _empty_outline()
+            if max_pages is not None and page_count > max_pages:
+                return DeferredDocument(page_count, cache_path)
+
+            lines = extractor.extract_text_lines(executor)
+
+        outline = _classify(lines)
+
+    except (RecursionError, NotImplementedError):
+        # RuntimeError subclasses that point at a bug, not a damaged file
+        raise
+    except (RuntimeError, ValueError) as e:
+        # Damaged or unsupported documents yield an empty outline; anything
+        # else propagates so the caller can report it for this file. PyMuPDF
+        # reports damage as RuntimeError, of which FileDataError is one case
+        # (e.g. a broken page tree raises a plain RuntimeError).
+        logging.warning("Cannot parse '%s': %s", pdf_path or '<bytes>', e)
+        return _empty_outline()
+
+    if cache_path:
+        _store_cached(cache_path, outline)
+
+    return outline
+
+
+def extract_deferred(pdf_path: str, deferred: DeferredDocument,
+                     executor: Executor) -> dict:
+    """
+    Extracts the outline of a document deferred by extract_outline.
+
+    The pages are extracted in chunks on the executor, whose workers reopen
+    the file from disk; the outline is classified and cached here.
+    """
+    try:
+        lines = text_extraction.extract_page_chunks(pdf_path, deferred.page_count, executor)
+        outline = _classify(lines)
+    except (RecursionError, NotImplementedError):
+        raise
+    except (RuntimeError, ValueError) as e:
+        logging.warning("Cannot parse '%s': %s", pdf_path, e)
+        return _empty_outline()
+
+    if deferred.cache_path:
+        _store_cached(deferred.cache_path, outline)
+
+    return outline
+
+
+def _classify(lines: list) -> dict:
+    """Classify headings and extract structure from extracted lines."""
+    # The result always holds "title" and "outline"; only the diagnostic
+    # "error" key is dropped
+    outline = classify_headings(lines)
+    outline.pop("error", None)
+    return outline
+
+
+def clear_caches():
+    """Release caches shared across documents, e.g. at the end of a batch."""
+    text_extraction.clear_caches()
+    structure_analysis.clear_caches()
+
+
+def _empty_outline() -> dict:
+    """Result returned for documents without a usable outline."""
+    return {"title": "", "outline": []}
+
+
+def read_pdf(pdf_path: str) -> bytes:
+    """Read the raw contents of a PDF file."""
+    with open(pdf_path, 'rb') as f:
+        return f.read()
+
+
+def _content_key(data: bytes) -> str:
+    """Hash the PDF contents into a cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    # Outlines depend on the code version and on the spell-check backend
+    digest.update(f"{CACHE_VERSION}:{structure_analysis.DICTIONARY_BACKEND}".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _load_cached(cache_path: str) -> Optional[dict]:
+    """Return the cached outline, or None on a cache miss."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached(cache_path: str, outline: dict):
+    """Atomically write an outline to the cache, ignoring write failures."""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(outline, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -2,11 +2,25 @@ import os
 import sys
 import json
 import logging
-from kraken import extract_outline
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
 
 # Constants for directories
 INPUT_DIR = '/app/input'
 OUTPUT_DIR = '/app/output'
+CACHE_DIRNAME = '.cache'
+
+# Outputs are written compactly unless pretty-printing is requested
+PRETTY_OUTPUT = os.environ.get('KRAKEN_PRETTY') == '1'
+
+# 'json' writes one file per PDF, 'ndjson' a single combined file
+OUTPUT_MODE = os.environ.get('KRAKEN_OUTPUT_MODE', 'json').lower()
+NDJSON_FILENAME = 'outlines.ndjson'
 
 # Configure logging
 logging.basicConfig(
@@ -18,53 +32,232 @@ logging.basicConfig(
 def ensure_directories():
     """
     Ensure that the input and output directories exist and are accessible.
+
+    Returns False (after logging the problem) if they are not.
     """
     if not os.path.isdir(INPUT_DIR) or not os.access(INPUT_DIR, os.R_OK):
-        logging.error(f"Cannot read input directory: {INPUT_DIR}")
-        sys.exit(1)
+        logging.error("Cannot read input directory: %s", INPUT_DIR)
+        return False
 
     if not os.path.isdir(OUTPUT_DIR):
         try:
             os.makedirs(OUTPUT_DIR, exist_ok=True)
-            logging.info(f"Created output directory: {OUTPUT_DIR}")
+            logging.info("Created output directory: %s", OUTPUT_DIR)
         except Exception as e:
-            logging.error(f"Failed to create output directory: {OUTPUT_DIR} - {e}")
-            sys.exit(1)
+            logging.error("Failed to create output directory: %s - %s", OUTPUT_DIR, e)
+            return False
     elif not os.access(OUTPUT_DIR, os.W_OK):
-        logging.error(f"Cannot write to output directory: {OUTPUT_DIR}")
-        sys.exit(1)
+        logging.error("Cannot write to output directory: %s", OUTPUT_DIR)
+        return False
+
+    return True
+
+def get_worker_count():
+    """
+    Number of worker processes, taken from KRAKEN_WORKERS or the CPU count.
+    """
+    value = os.environ.get('KRAKEN_WORKERS')
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logging.warning("Ignoring invalid KRAKEN_WORKERS value: %r", value)
+    return os.cpu_count() or 1
+
+def get_mp_context():
+    """
+    Multiprocessing context for the worker pool.
+
+    On Linux workers are forked, so the kraken modules already imported by
+    the parent are shared copy-on-write instead of re-imported per worker.
+    Other platforms (macOS, Windows) keep their default, spawn.
+    """
+    if sys.platform.startswith('linux'):
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
 
 def process_pdfs():
     """
     Process all PDF files in the input directory and extract their outlines.
     """
-    files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith('.pdf')]
+    with os.scandir(INPUT_DIR) as entries:
+        files = [
+            entry.name for entry in entries
+            if entry.name[-4:].lower() == '.pdf' and entry.is_file()
+        ]
     if not files:
-        logging.warning(f"No PDF files found in {INPUT_DIR}")
+        logging.warning("No PDF files found in %s", INPUT_DIR)
+        return
+
+    if OUTPUT_MODE == 'ndjson':
+        write_ndjson(iter_outlines(files))
         return
 
-    for pdf in files:
-        path_in = os.path.join(INPUT_DIR, pdf)
+    # Outputs at least as new as their PDF are left alone, so retried or
+    # restarted runs only process what changed
+    pending = [pdf for pdf in files if not is_up_to_date(pdf)]
+    skipped = len(files) - len(pending)
+    if skipped:
+        logging.info("Skipping %d PDF(s) with up-to-date outputs", skipped)
+
+    if pending:
+        for pdf, data in iter_outlines(pending):
+            write_output(pdf, data)
+
+def iter_outlines(files):
+    """
+    Extract the outline of each PDF, yielding (filename, outline) pairs.
+
+    Files that fail are logged and skipped.
+    """
+    # Imported here so that misconfigured or empty runs exit without paying
+    # for PyMuPDF and the dictionary backend
+    from kraken import clear_caches
+
+    # Outlines are cached by PDF content so unchanged files are not re-parsed
+    cache_dir = os.path.join(OUTPUT_DIR, CACHE_DIRNAME)
+
+    try:
+        workers = min(get_worker_count(), len(files))
+        if workers == 1:
+            yield from iter_outlines_serial(files, cache_dir)
+        else:
+            yield from iter_outlines_parallel(files, cache_dir, workers)
+    finally:
+        # Bound the memory held by caches shared across the batch
+        clear_caches()
+
+def iter_outlines_serial(files, cache_dir):
+    """
+    Extract outlines one PDF at a time in this process.
+    """
+    from kraken import extract_outline_from_bytes, read_pdf
+
+    # Read the next PDF on a background thread while the current one is
+    # parsed, keeping at most one file in flight.
+    paths = [os.path.join(INPUT_DIR, pdf) for pdf in files]
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read_pdf, paths[0])
+        for i, pdf in enumerate(files):
+            current = pending
+            if i + 1 < len(paths):
+                pending = reader.submit(read_pdf, paths[i + 1])
+            try:
+                data = extract_outline_from_bytes(current.result(), cache_dir,
+                                                  pdf_path=paths[i])
+            except Exception as e:
+                logging.error("Error processing '%s': %s", pdf, e)
+                continue
+            yield pdf, data
+
+def iter_outlines_parallel(files, cache_dir, workers):
+    """
+    Extract outlines on a pool of worker processes.
+    """
+    from kraken import PAGE_CHUNK_SIZE, DeferredDocument, extract_deferred, extract_outline
+
+    # Each PDF is independent; only the outline dict crosses the process
+    # boundary, the JSON is written here in the parent.
+    paths = {pdf: os.path.join(INPUT_DIR, pdf) for pdf in files}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_mp_context()) as executor:
+        # Every PDF is submitted straight away; workers check the cache and
+        # count pages as they open each file, so the parent never opens them
+        # up front. Long uncached documents come back deferred.
+        futures = {
+            pdf: executor.submit(extract_outline, paths[pdf], cache_dir, None, PAGE_CHUNK_SIZE)
+            for pdf in files
+        }
+
+        for pdf, future in futures.items():
+            try:
+                data = future.result()
+                if isinstance(data, DeferredDocument):
+                    # Split the long document into page chunks queued on the
+                    # same pool, so it does not keep a single worker busy while
+                    # the others sit idle; classification runs here once the
+                    # chunks are back.
+                    data = extract_deferred(paths[pdf], data, executor)
+            except Exception as e:
+                logging.error("Error processing '%s': %s", pdf, e)
+                continue
+            yield pdf, data
+
+def get_output_path(pdf):
+    """
+    Path of the JSON output written for a PDF.
+    """
+    base = os.path.splitext(pdf)[0]
+    return os.path.join(OUTPUT_DIR, f"{base}.json")
+
+def is_up_to_date(pdf):
+    """
+    Check whether the output for a PDF exists and is not older than the PDF.
+    """
+    try:
+        out_mtime = os.stat(get_output_path(pdf)).st_mtime
+        return out_mtime >= os.stat(os.path.join(INPUT_DIR, pdf)).st_mtime
+    except FileNotFoundError:
+        return False
+
+def encode_output(data, pretty=False):
+    """
+    Serialize an outline to UTF-8 encoded JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_output(pdf, data):
+    """
+    Write the extracted outline for a PDF to the output directory.
+    """
+    out_path = get_output_path(pdf)
+    tmp_path = f"{out_path}.tmp"
+
+    # Write to a temporary file and rename it into place so readers never
+    # see a partially written output
+    try:
+        payload = encode_output(data, PRETTY_OUTPUT)
+        with open(tmp_path, 'wb') as fout:
+            fout.write(payload)
+        os.replace(tmp_path, out_path)
+        logging.info("Processed: %s -> %s", pdf, os.path.basename(out_path))
+    except Exception as e:
+        logging.error("Failed writing output for '%s': %s", pdf, e)
         try:
-            data = extract_outline(path_in)
-        except Exception as e:
-            logging.error(f"Error processing '{pdf}': {e}")
-            continue
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
-        # Prepare output filename
-        base = os.path.splitext(pdf)[0]
-        out_path = os.path.join(OUTPUT_DIR, f"{base}.json")
+def write_ndjson(outlines):
+    """
+    Write all outlines to a single NDJSON file, one {"file": ..., **outline}
+    record per line.
+    """
+    out_path = os.path.join(OUTPUT_DIR, NDJSON_FILENAME)
+    tmp_path = f"{out_path}.tmp"
 
+    try:
+        with open(tmp_path, 'wb') as fout:
+            for pdf, data in outlines:
+                fout.write(encode_output({'file': pdf, **data}))
+                fout.write(b'\n')
+                logging.info("Processed: %s -> %s", pdf, NDJSON_FILENAME)
+        os.replace(tmp_path, out_path)
+    except Exception as e:
+        logging.error("Failed writing output to '%s': %s", NDJSON_FILENAME, e)
         try:
-            with open(out_path, 'w', encoding='utf-8') as fout:
-                json.dump(data, fout, ensure_ascii=False, indent=2)
-            logging.info(f"Processed: {pdf} -> {base}.json")
-        except Exception as e:
-            logging.error(f"Failed writing output for '{pdf}': {e}")
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 def main():
-    ensure_directories()
+    if not ensure_directories():
+        return 1
     process_pdfs()
+    return 0
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    raise SystemExit(main())
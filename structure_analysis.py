@@ -1,13 +1,113 @@
 import json
 from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict, Counter
+from collections import Counter
 from dataclasses import dataclass, field
+from itertools import accumulate, chain, groupby, pairwise
+from operator import attrgetter, itemgetter, methodcaller, neg
+from bisect import bisect_right
 import re
 import enchant
 import string
+import functools
+import math
+import sys
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
 
 # Create English dictionary
 d = enchant.Dict("en_US")
+_check_word = d.check
+
+# Enchant picks its provider (hunspell, nuspell, aspell) by what is installed
+DICTIONARY_BACKEND = d.provider.name
+
+# Frequent English function words, answered without a dictionary lookup
+_COMMON_WORDS = frozenset({
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can',
+    'this', 'that', 'these', 'those', 'what', 'which', 'who', 'when', 'where', 'why', 'how',
+    'about', 'above', 'after', 'again', 'against', 'all', 'any', 'as', 'because', 'before',
+    'below', 'between', 'both', 'during', 'each', 'few', 'from', 'further',
+    'if', 'into', 'more', 'most', 'no', 'not', 'only', 'other', 'over', 'same', 'some',
+    'such', 'than', 'through', 'under', 'until', 'up', 'very', 'while', 'within', 'without'
+})
+
+_VOWELS = frozenset('aeiouAEIOU')
+
+# Page number formats, matched against lowercased text
+_PAGE_NUMBER_RE = re.compile(
+    r'^(?:'
+    r'\d+'  # Just a number
+    r'|page\s+\d+'  # "page 1"
+    r'|p\.\s*\d+'  # "p. 1"
+    r'|\d+\s*/\s*\d+'  # "1 / 10"
+    r'|-\s*\d+\s*-'  # "- 1 -"
+    r')$'
+)
+
+# Text patterns that rule out a title candidate
+_TITLE_EXCLUDE_PATTERNS = (
+    r'^[0-9\s\-\.\/]+$',  # Only numbers, spaces, dashes, dots, slashes
+    r'^[A-Z]{3,}\s*[0-9]+$',  # Pattern like "ABC 123" or "FORM123"
+    r'^\d+[\.\-\s]*\d*$',  # Pure numeric patterns
+    r'^[^\w\s]{3,}$',  # Only special characters
+    r'.*\b(rev|version|ver|v)\s*[\d\.]+\b.*',  # Version numbers
+    r'.*\b\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4}\b.*',  # Dates
+    r'.*\b[A-Z]{2,}\-\d+\b.*',  # Code patterns like "ABC-123"
+    r'^(table|figure|chart|graph|image|photo)\s+\d+.*',  # Figure/table references
+    r'.*-{2,}.*',  # Text containing consecutive dashes
+)
+
+# Matched as a single alternation so a candidate is scanned by one regex
+_TITLE_EXCLUDE_RE = re.compile('|'.join(f'(?:{p})' for p in _TITLE_EXCLUDE_PATTERNS), re.IGNORECASE)
+
+_WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+
+_PUNCT_DELETE = str.maketrans('', '', string.punctuation)
+
+# Code, ID and technical reference patterns, combined for a single search
+_TECH_ID_RE = re.compile(
+    r'[a-zA-Z]+\d+[a-zA-Z]+\d+'  # Mixed letters and numbers pattern
+    r'|\b[A-Z]{2,}_[A-Z0-9_]+\b'  # Underscore separated caps
+    r'|\b[a-z]+[A-Z][a-z]*[A-Z]'  # camelCase patterns
+    r'|\b\w*[0-9]{3,}\w*\b'  # Words with 3+ consecutive digits
+    r'|\b[A-F0-9]{8,}\b'  # Hex-like patterns
+)
+
+# Letters in ASCII text, where str.isalpha reduces to [A-Za-z]
+_ASCII_ALPHA_RE = re.compile(r'[A-Za-z]')
+
+# Heading score bonus by word count (index), fewer words score higher.
+# Empty text gets the two-word bonus, as the original if/elif chain did.
+_WC_BONUS = (15.0, 20.0, 15.0, 12.0, 10.0, 8.0, 5.0, 3.0, 1.0)
+
+@functools.lru_cache(maxsize=1 << 16)
+def _spell_check(word: str) -> bool:
+    """Dictionary lookup, cached since headings repeat words across pages"""
+    return _check_word(word)
+
+def _is_english_word(word: str) -> bool:
+    """Check a word against the common-word set, then the dictionary"""
+    # The dictionary accepts lowercase words in lower, title and upper case
+    if word.lower() in _COMMON_WORDS and (word.islower() or word.istitle() or word.isupper()):
+        return True
+    return _spell_check(word)
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_font(font: str) -> str:
+    """Normalized font name used in group signatures, interned so that
+    signatures compare and hash on a shared string"""
+    return sys.intern(font.lower().replace('-', '').replace(' ', ''))
+
+def clear_caches():
+    """Drop the module-level word, text and font caches."""
+    _spell_check.cache_clear()
+    _classify_cached.cache_clear()
+    _normalize_font.cache_clear()
 
 def classify_string(text: str) -> bool:
     """
@@ -19,7 +119,11 @@ def classify_string(text: str) -> bool:
     - Must contain letters (not only numbers/special chars)
     - If not starting with number, first word must be capitalized
     """
-    text = text.strip()
+    return _classify_cached(text.strip())
+
+@functools.lru_cache(maxsize=16384)
+def _classify_cached(text: str) -> bool:
+    """classify_string on stripped text, cached since headings and labels repeat across pages"""
     if not text or len(text) < 3:
         return False
 
@@ -29,14 +133,16 @@ def classify_string(text: str) -> bool:
         return False
     
     # Reject if text contains only numbers and special characters (no letters)
-    if not any(c.isalpha() for c in text):
+    if not _ASCII_ALPHA_RE.search(text) and not any(map(str.isalpha, text)):
         return False
     
     # Check capitalization rule for non-numeric starts
     if not text[0].isdigit():
         words = text.split()
         if words:
-            first_word = words[0].strip(string.punctuation)
+            # Only the first letter matters, so deleting all punctuation
+            # gives the same answer as stripping it from the ends
+            first_word = words[0].translate(_PUNCT_DELETE)
             if first_word and first_word[0].islower():
                 return False
     
@@ -52,24 +158,46 @@ def classify_string(text: str) -> bool:
         return True
 
     # Check if entire text is a valid English word
-    if d.check(cleaned):
+    if _is_english_word(cleaned):
         return True
 
     # Check if text contains at least one valid English word
     words = cleaned.split()
     for word in words:
         word_clean = word.strip(string.punctuation)
-        if len(word_clean) >= 2 and d.check(word_clean):
+        if len(word_clean) >= 2 and _is_english_word(word_clean):
             return True
     
     # Allow common title/heading patterns
     if len(cleaned) >= 3:
-        alpha_count = sum(1 for c in cleaned if c.isalpha())
+        if cleaned.isascii():
+            alpha_count = len(_ASCII_ALPHA_RE.findall(cleaned))
+        else:
+            alpha_count = sum(map(str.isalpha, cleaned))
         if alpha_count >= len(cleaned) * 0.5:  # At least 50% letters
             return True
 
     return False
 
+def _suffix_prefix_overlap(text1: str, text2: str, max_len: int) -> int:
+    """Length of the longest suffix of text1 that is a prefix of text2, at most max_len.
+
+    Computed with the KMP prefix function over text2[:max_len], a sentinel
+    and text1[-max_len:], in time linear in max_len.
+    """
+    if max_len <= 0:
+        return 0
+    seq = [*text2[:max_len], None, *text1[-max_len:]]
+    prefix = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = prefix[i - 1]
+        while k and seq[i] != seq[k]:
+            k = prefix[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1]
+
 class HeaderFooterDetector:
     """Detects and removes headers/footers using position and style analysis"""
     
@@ -79,31 +207,26 @@ class HeaderFooterDetector:
         self.header_threshold = 0.12  # Top 12%
         self.footer_threshold = 0.88  # Bottom 12%
         self.min_repetition = 2
+
+        # Position limits are fixed per detector, so compute them once rather
+        # than for every page and element
+        self.header_y_limit = page_height * self.header_threshold
+        self.footer_y_limit = page_height * self.footer_threshold
+
+        # Page number checks from style scoring, reused by pattern creation
+        self._page_number_cache = {}
         
     def detect_headers_footers(self, all_pages_data):
-        """Main detection method combining position, style, and repetition analysis"""
+        """Main detection method combining position, style, and repetition analysis
+
+        all_pages_data is an iterable of (page_num, elements) pairs.
+        """
         results = {}
+        self._page_number_cache = {}
         
-        for page_num, elements in all_pages_data.items():
-            # Position-based detection
-            pos_headers, pos_footers, pos_content = self._detect_by_position(elements)
-            
-            # Style-based detection
-            style_headers, style_footers, style_content = self._detect_by_style(elements)
-            
-            # Combine results using intersection for higher confidence
-            final_headers = self._combine_detections(pos_headers, style_headers)
-            final_footers = self._combine_detections(pos_footers, style_footers)
-            
-            # Remove headers/footers from main content
-            header_indices = {elem.get('original_index') for elem in final_headers}
-            footer_indices = {elem.get('original_index') for elem in final_footers}
-            
-            main_content = [
-                elem for elem in elements 
-                if elem.get('original_index') not in header_indices 
-                and elem.get('original_index') not in footer_indices
-            ]
+        for page_num, elements in all_pages_data:
+            # Position and style detection, intersected for higher confidence
+            final_headers, final_footers, main_content = self._detect_combined(list(elements))
             
             results[page_num] = {
                 'headers': final_headers,
@@ -116,109 +239,85 @@ class HeaderFooterDetector:
         
         return results
     
-    def _detect_by_position(self, elements):
-        """Detect headers/footers based on position on page"""
+    def _detect_combined(self, elements):
+        """Detect headers/footers by position and style in a single pass
+
+        An element is a header (footer) when it lies in the top (bottom) 12%
+        of the page and its style score is at least 2. Content keeps the
+        remaining elements in order. This is the intersection of a pure
+        position check over those zones with a style check (score >= 2) over
+        the wider 15%/85% zones: the style zones contain the position zones,
+        so only the position zones need testing.
+        """
+        if not elements:
+            return [], [], []
+        
+        font_sizes = [elem.font_size for elem in elements]
+        counts = Counter(font_sizes)
+        main_font_size = max(set(font_sizes), key=counts.__getitem__)
+        
         headers = []
         footers = []
         content = []
         
-        header_y_limit = self.page_height * self.header_threshold
-        footer_y_limit = self.page_height * self.footer_threshold
+        header_y_limit = self.header_y_limit
+        footer_y_limit = self.footer_y_limit
         
         for element in elements:
-            y_pos = element.get('y', self.page_height / 2)
-            
+            y_pos = element.y
             if y_pos <= header_y_limit:
-                headers.append(element)
+                zone = headers
             elif y_pos >= footer_y_limit:
-                footers.append(element)
+                zone = footers
             else:
                 content.append(element)
-        
-        return headers, footers, content
-    
-    def _detect_by_style(self, elements):
-        """Detect headers/footers based on font style characteristics"""
-        if not elements:
-            return [], [], []
-        
-        # Calculate main font size
-        font_sizes = [elem.get('font_size', 12) for elem in elements]
-        main_font_size = max(set(font_sizes), key=font_sizes.count)
-        
-        headers = []
-        footers = []
-        content = []
-        
-        for element in elements:
-            font_size = element.get('font_size', 12)
-            text = element.get('text', '').strip()
-            y_pos = element.get('y', self.page_height / 2)
+                continue
             
-            # Style indicators for headers/footers
-            is_small_font = font_size < main_font_size * 0.85
-            is_page_number = self._is_page_number(text)
-            is_short = len(text) < 60
-            is_italic = element.get('is_italic', False)
-            
-            # Calculate header/footer likelihood score
-            hf_score = 0
-            if is_small_font: hf_score += 2
-            if is_page_number: hf_score += 3
-            if is_short: hf_score += 1
-            if is_italic: hf_score += 1
-            
-            # Position-based classification with style weighting
-            if y_pos <= self.page_height * 0.15:  # Top area
-                if hf_score >= 2:
-                    headers.append(element)
-                else:
-                    content.append(element)
-            elif y_pos >= self.page_height * 0.85:  # Bottom area
-                if hf_score >= 2:
-                    footers.append(element)
-                else:
-                    content.append(element)
+            # Only elements in a header/footer zone need a style score
+            if self._style_score(element, main_font_size) >= 2:
+                zone.append(element)
             else:
                 content.append(element)
         
         return headers, footers, content
     
+    def _style_score(self, element, main_font_size):
+        """Header/footer likelihood score from font style characteristics"""
+        text = element.text
+        
+        # Style indicators for headers/footers
+        is_small_font = element.font_size < main_font_size * 0.85
+        is_page_number = self._is_page_number(text)
+        self._page_number_cache[element.original_index] = is_page_number
+        is_short = len(text) < 60
+        is_italic = element.is_italic
+        
+        # Calculate header/footer likelihood score
+        hf_score = 0
+        if is_small_font: hf_score += 2
+        if is_page_number: hf_score += 3
+        if is_short: hf_score += 1
+        if is_italic: hf_score += 1
+        return hf_score
+    
     def _is_page_number(self, text):
         """Check if text looks like a page number"""
-        patterns = [
-            r'^\d+$',  # Just a number
-            r'^page\s+\d+$',  # "page 1"
-            r'^p\.\s*\d+$',  # "p. 1"
-            r'^\d+\s*/\s*\d+$',  # "1 / 10"
-            r'^-\s*\d+\s*-$',  # "- 1 -"
-        ]
-        
         text_lower = text.lower().strip()
-        return any(re.match(pattern, text_lower) for pattern in patterns)
-    
-    def _combine_detections(self, detection1, detection2):
-        """Combine two detection results using intersection"""
-        indices1 = {elem.get('original_index') for elem in detection1}
-        indices2 = {elem.get('original_index') for elem in detection2}
-        
-        common_indices = indices1.intersection(indices2)
-        
-        return [elem for elem in detection1 if elem.get('original_index') in common_indices]
+        return _PAGE_NUMBER_RE.match(text_lower) is not None
     
     def _refine_by_repetition(self, results):
         """Refine detection using cross-page repetition analysis"""
-        header_patterns = defaultdict(list)
-        footer_patterns = defaultdict(list)
+        header_patterns = {}
+        footer_patterns = {}
         
         for page_num, page_data in results.items():
             for header in page_data['headers']:
                 pattern = self._create_pattern(header)
-                header_patterns[pattern].append((page_num, header))
+                header_patterns.setdefault(pattern, []).append((page_num, header))
             
             for footer in page_data['footers']:
                 pattern = self._create_pattern(footer)
-                footer_patterns[pattern].append((page_num, footer))
+                footer_patterns.setdefault(pattern, []).append((page_num, footer))
         
         # Find truly repeated patterns
         repeated_headers = {
@@ -232,31 +331,31 @@ class HeaderFooterDetector:
         }
         
         # Mark repeated elements as confirmed headers/footers
-        for page_num, page_data in results.items():
-            for pattern, pages in repeated_headers.items():
-                for p_num, element in pages:
-                    if p_num == page_num:
-                        element['is_repeated_header'] = True
-            
-            for pattern, pages in repeated_footers.items():
-                for p_num, element in pages:
-                    if p_num == page_num:
-                        element['is_repeated_footer'] = True
+        for pages in repeated_headers.values():
+            for _, element in pages:
+                element.is_repeated_header = True
+        
+        for pages in repeated_footers.values():
+            for _, element in pages:
+                element.is_repeated_footer = True
     
     def _create_pattern(self, element):
         """Create a pattern for repetition detection"""
-        text = element.get('text', '').strip()
-        y_norm = round(element.get('y', 0) / self.page_height, 2)
-        x_norm = round(element.get('x', 0) / self.page_width, 2)
+        text = element.text
+        y_norm = round(element.y / self.page_height, 2)
+        x_norm = round(element.x / self.page_width, 2)
         
         # For page numbers, use position only
-        if self._is_page_number(text):
+        is_page_number = self._page_number_cache.get(element.original_index)
+        if is_page_number is None:
+            is_page_number = self._is_page_number(text)
+        if is_page_number:
             return ('PAGE_NUMBER', y_norm, x_norm)
         
         # For other text, use text + position
         return (text, y_norm, x_norm)
 
-@dataclass
+@dataclass(slots=True)
 class TextElement:
     """Represents a processed text element with validated attributes"""
     text: str = ""
@@ -272,69 +371,39 @@ class TextElement:
     original_index: int = 0
     x: float = 0.0
     y: float = 0.0
+    is_repeated_header: bool = False
+    is_repeated_footer: bool = False
     
-    def __post_init__(self):
-        """Validate and clean the text element data"""
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any], index: int = 0) -> Optional['TextElement']:
+        """Build a validated element from an input line dict, or None if invalid"""
         try:
-            # Clean and validate text
-            self.text = str(self.text).strip() if self.text is not None else ""
-            
-            # Validate numeric fields
-            self.page = max(1, int(self.page)) if self.page is not None else 1
-            self.font_size = float(self.font_size) if self.font_size is not None else 12.0
-            self.space_above = float(self.space_above) if self.space_above is not None else 0.0
-            self.space_below = float(self.space_below) if self.space_below is not None else 0.0
-            self.x = float(self.x) if self.x is not None else 0.0
-            self.y = float(self.y) if self.y is not None else 0.0
-
-            # Handle legacy coordinate fields
-            if hasattr(self, 'x0') and self.x == 0.0:
-                self.x = float(getattr(self, 'x0', 0.0))
-            if hasattr(self, 'y0') and self.y == 0.0:
-                self.y = float(getattr(self, 'y0', 0.0))
-            
-            # Validate string and boolean fields
-            self.font = str(self.font) if self.font is not None else "Arial"
-            self.is_bold = bool(self.is_bold) if self.is_bold is not None else False
-            self.is_italic = bool(self.is_italic) if self.is_italic is not None else False
-            self.is_underlined = bool(self.is_underlined) if self.is_underlined is not None else False
-            self.is_center = bool(self.is_center) if self.is_center is not None else False
-            
+            text = item.get('text', '')
+            page = item.get('page', 1)
+            font_size = item.get('font_size', 12.0)
+            font = item.get('font', 'Arial')
+            space_above = item.get('space_above', 0.0)
+            space_below = item.get('space_below', 0.0)
+            x = item.get('x', item.get('x0', 0.0))
+            y = item.get('y', item.get('y0', 0.0))
+            
+            return cls(
+                text=str(text).strip() if text is not None else "",
+                page=max(1, int(page)) if page is not None else 1,
+                font_size=float(font_size) if font_size is not None else 12.0,
+                font=str(font) if font is not None else "Arial",
+                is_bold=bool(item.get('is_bold', False)),
+                is_italic=bool(item.get('is_italic', False)),
+                is_underlined=bool(item.get('is_underlined', False)),
+                is_center=bool(item.get('is_center', False)),
+                space_above=float(space_above) if space_above is not None else 0.0,
+                space_below=float(space_below) if space_below is not None else 0.0,
+                x=float(x) if x is not None else 0.0,
+                y=float(y) if y is not None else 0.0,
+                original_index=index
+            )
         except (ValueError, TypeError):
-            self._set_defaults()
-    
-    def _set_defaults(self):
-        """Set default values for invalid data"""
-        self.text = ""
-        self.page = 1
-        self.font_size = 12.0
-        self.font = "Arial"
-        self.is_bold = False
-        self.is_italic = False
-        self.is_underlined = False
-        self.is_center = False
-        self.space_above = 0.0
-        self.space_below = 0.0
-        self.x = 0.0
-        self.y = 0.0
-    
-    def to_dict(self):
-        """Convert TextElement to dictionary for header/footer detection"""
-        return {
-            'text': self.text,
-            'page': self.page,
-            'font_size': self.font_size,
-            'font': self.font,
-            'is_bold': self.is_bold,
-            'is_italic': self.is_italic,
-            'is_underlined': self.is_underlined,
-            'is_center': self.is_center,
-            'space_above': self.space_above,
-            'space_below': self.space_below,
-            'original_index': self.original_index,
-            'x': self.x,
-            'y': self.y
-        }
+            return None
 
 @dataclass
 class HeadingGroup:
@@ -347,6 +416,10 @@ class HeadingGroup:
     elements: List[TextElement] = field(default_factory=list)
     level: Optional[str] = None
     is_underlined: bool = False
+    space_above: float = 0.0
+    space_below: float = 0.0
+    # Priority score, computed on first use; reset whenever elements change
+    _score: Optional[float] = field(default=None, init=False, repr=False, compare=False)
     
     def get_signature(self) -> Tuple:
         """Get unique signature for grouping"""
@@ -355,9 +428,21 @@ class HeadingGroup:
     def add_element(self, element: TextElement):
         """Add element to the group"""
         self.elements.append(element)
+        self._score = None
+    
+    def set_elements(self, elements: List[TextElement]):
+        """Replace the group's elements"""
+        self.elements = elements
+        self._score = None
     
     def get_priority_score(self) -> float:
         """Calculate priority score with font size, style, and word count bonuses"""
+        if self._score is None:
+            self._score = self._calculate_priority_score()
+        return self._score
+    
+    def _calculate_priority_score(self) -> float:
+        """Compute the score returned by get_priority_score"""
         # Base score from font size
         score = self.font_size * 100
         
@@ -368,58 +453,38 @@ class HeadingGroup:
             score += 5
         if self.is_italic:
             score += 11
-        if hasattr(self, 'is_underlined') and self.is_underlined:
+        if self.is_underlined:
             score += 11
         
         # Spacing-based bonus
-        if hasattr(self, 'space_above') and self.space_above > 10:
+        if self.space_above > 10:
             score += 5
-        if hasattr(self, 'space_below') and self.space_below > 10:
+        if self.space_below > 10:
             score += 3
         
-        # Word count bonus - fewer words get higher bonus
-        word_count_bonus = self._calculate_word_count_bonus()
-        score += word_count_bonus
+        # Word count bonus - fewer words get higher bonus, averaged over
+        # the group's elements (no bonus above 8 words)
+        elements = self.elements
+        if elements:
+            total_bonus = 0.0
+            for element in elements:
+                word_count = len(element.text.split())
+                if word_count <= 8:
+                    total_bonus += _WC_BONUS[word_count]
+            score += total_bonus / len(elements)
         
         return score
 
-    def _calculate_word_count_bonus(self) -> float:
-        """Calculate bonus score based on word count - fewer words = higher bonus"""
-        if not self.elements:
-            return 0.0
-        
-        total_bonus = 0.0
-        element_count = 0
-        
-        for element in self.elements:
-            words = element.text.strip().split()
-            word_count = len([word for word in words if word.strip()])
-            
-            # Calculate bonus for this element (no bonus if more than 8 words)
-            if word_count <= 8:
-                if word_count == 1:
-                    element_bonus = 20.0
-                elif word_count <= 2:
-                    element_bonus = 15.0
-                elif word_count <= 3:
-                    element_bonus = 12.0
-                elif word_count <= 4:
-                    element_bonus = 10.0
-                elif word_count <= 5:
-                    element_bonus = 8.0
-                elif word_count <= 6:
-                    element_bonus = 5.0
-                elif word_count <= 7:
-                    element_bonus = 3.0
-                else:  # word_count == 8
-                    element_bonus = 1.0
-            else:
-                element_bonus = 0.0
-            
-            total_bonus += element_bonus
-            element_count += 1
-        
-        return total_bonus / element_count if element_count > 0 else 0.0
+@dataclass(slots=True)
+class OutlineEntry:
+    """A single heading in the generated outline"""
+    level: str
+    text: str
+    page: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the output JSON format"""
+        return {"level": self.level, "text": self.text, "page": self.page}
 
 class HeadingClassifier:
     """Main class for classifying headings with header/footer detection"""
@@ -429,10 +494,10 @@ class HeadingClassifier:
         self.groups: List[HeadingGroup] = []
         self.title: Optional[str] = None
         self.title_elements: List[TextElement] = []
-        self.outline: List[Dict[str, Any]] = []
+        self.outline: List[OutlineEntry] = []
         self.font_size_threshold = 30
         self.header_footer_detector = HeaderFooterDetector()
-        self.excluded_indices: set = set()
+        self.excluded_indices: frozenset = frozenset()
         self.max_text_length_for_lowest = 50
         
     def _validate_input(self, data: Any) -> bool:
@@ -451,32 +516,18 @@ class HeadingClassifier:
             if not isinstance(item, dict):
                 continue
             
-            element = TextElement(
-                text=item.get('text', ''),
-                page=item.get('page', 1),
-                font_size=item.get('font_size', 12.0),
-                font=item.get('font', 'Arial'),
-                is_bold=item.get('is_bold', False),
-                is_italic=item.get('is_italic', False),
-                is_underlined=item.get('is_underlined', False),
-                is_center=item.get('is_center', False),
-                space_above=item.get('space_above', 0.0),
-                space_below=item.get('space_below', 0.0),
-                x=item.get('x', item.get('x0', 0.0)),
-                y=item.get('y', item.get('y0', 0.0)),
-                original_index=i
-            )
+            element = TextElement.from_dict(item, i)
             
-            if element.text:
+            if element is not None and element.text:
                 self.elements.append(element)
     
     def _detect_and_remove_headers_footers(self):
         """Detect and remove headers/footers from elements"""
         try:
-            # Group elements by page
-            pages_data = defaultdict(list)
-            for element in self.elements:
-                pages_data[element.page].append(element.to_dict())
+            # Group elements by page with a single (stable) sort; elements
+            # arrive in reading order, so this is usually already sorted
+            pages_data = groupby(sorted(self.elements, key=attrgetter('page')),
+                                 key=attrgetter('page'))
             
             # Run header/footer detection
             hf_results = self.header_footer_detector.detect_headers_footers(pages_data)
@@ -486,17 +537,17 @@ class HeadingClassifier:
             
             for page_num, page_data in hf_results.items():
                 for header in page_data['headers']:
-                    header_footer_indices.add(header['original_index'])
+                    header_footer_indices.add(header.original_index)
                 
                 for footer in page_data['footers']:
-                    header_footer_indices.add(footer['original_index'])
+                    header_footer_indices.add(footer.original_index)
             
-            self.excluded_indices = header_footer_indices
+            self.excluded_indices = frozenset(header_footer_indices)
             
             # Filter out header/footer elements
             self.elements = [
                 element for element in self.elements 
-                if element.original_index not in header_footer_indices
+                if element.original_index not in self.excluded_indices
             ]
             
         except Exception:
@@ -514,35 +565,18 @@ class HeadingClassifier:
         if len(font_size_counts) <= 3:
             return
         
-        # Smart filtering based on percentage
-        excluded_sizes = set()
-        kept_sizes = set()
-        
-        for font_size, count in font_size_counts.items():
-            percentage = (count / total_elements) * 100
-            
-            # Exclude if it's more than 50% of all elements (likely body text)
-            if percentage > 50:
-                excluded_sizes.add(font_size)
-            else:
-                kept_sizes.add(font_size)
+        # Exclude a size used by more than 50% of all elements (likely body
+        # text). Only the most common size can pass that bar, and with more
+        # than three sizes present the largest ones are always kept.
+        body_size, body_count = font_size_counts.most_common(1)[0]
+        excluded_sizes = {body_size} if body_count * 2 > total_elements else set()
         
-        # Apply classify_string filter early to reduce elements
+        # Filter by font size and classify_string in one pass. The size test
+        # runs first - body text is the bulk of the document and need not go
+        # through the dictionary checks
         self.elements = [
             element for element in self.elements 
-            if classify_string(element.text)
-        ]
-        
-        # Safety check: Always keep at least the largest font sizes
-        if not kept_sizes:
-            largest_sizes = sorted(font_size_counts.keys(), reverse=True)[:3]
-            kept_sizes = set(largest_sizes)
-            excluded_sizes = set(font_size_counts.keys()) - kept_sizes
-        
-        # Filter elements
-        self.elements = [
-            element for element in self.elements 
-            if element.font_size not in excluded_sizes
+            if element.font_size not in excluded_sizes and classify_string(element.text)
         ]
         
         # Final safety check
@@ -552,7 +586,10 @@ class HeadingClassifier:
     def _create_groups(self):
         """Group elements by formatting attributes with spatial proximity"""
         try:
-            group_map = defaultdict(list)
+            group_map = {}
+            # Full signatures seen so far for each base signature, in creation
+            # order, so candidates are found without scanning every group
+            base_to_sigs = {}
             
             for element in self.elements:
                 # Create base signature without is_center
@@ -560,22 +597,22 @@ class HeadingClassifier:
                     round(element.font_size, 1),
                     element.is_bold,
                     element.is_italic,
-                    element.font.lower().replace('-', '').replace(' ', '')
+                    _normalize_font(element.font)
                 )
                 
                 # Look for existing groups with same base formatting on same page
                 merged_to_existing = False
+                dynamic_threshold = max(3, element.font_size * 0.2)
                 
-                for signature, existing_elements in group_map.items():
-                    if (len(signature) >= 4 and signature[:4] == base_signature and 
-                        existing_elements and existing_elements[0].page == element.page):
+                for signature in base_to_sigs.get(base_signature, ()):
+                    existing_elements = group_map[signature]
+                    if existing_elements[0].page == element.page:
                         
                         # Check if spatially close to any element in this group
                         for existing_elem in existing_elements:
                             y_diff = abs(element.y - existing_elem.y)
-                            dynamic_threshold = max(3, element.font_size * 0.2)
                             if y_diff <= dynamic_threshold:
-                                group_map[signature].append(element)
+                                existing_elements.append(element)
                                 merged_to_existing = True
                                 break
                         
@@ -585,7 +622,12 @@ class HeadingClassifier:
                 # If not merged, create new group
                 if not merged_to_existing:
                     full_signature = base_signature + (element.is_center,)
-                    group_map[full_signature].append(element)
+                    existing_elements = group_map.get(full_signature)
+                    if existing_elements is None:
+                        base_to_sigs.setdefault(base_signature, []).append(full_signature)
+                        group_map[full_signature] = [element]
+                    else:
+                        existing_elements.append(element)
             
             # Create HeadingGroup objects
             self.groups = []
@@ -596,7 +638,7 @@ class HeadingClassifier:
                     is_italic = signature[2]
                     font = signature[3] if isinstance(signature[3], str) else "Arial"
                     is_center = signature[4] if len(signature) > 4 else False
-                    is_group_underlined = any(getattr(elem, 'is_underlined', False) for elem in elements)
+                    is_group_underlined = any(elem.is_underlined for elem in elements)
                     
                     group = HeadingGroup(
                         font_size=font_size,
@@ -631,44 +673,31 @@ class HeadingClassifier:
                     continue
                 
                 # Sort elements by page and original index
-                group.elements.sort(key=lambda e: (e.page, e.original_index))
+                elements = group.elements
+                elements.sort(key=attrgetter('page', 'original_index'))
                 
-                # Group consecutive elements that are spatially close
-                combined_elements = []
-                current_group = [group.elements[0]]
+                # Start a new run wherever an element does not continue the
+                # previous one: consecutive, on the same page and spatially close
+                breaks = [
+                    not (curr_elem.original_index - prev_elem.original_index <= 1
+                         and curr_elem.page == prev_elem.page
+                         and math.fabs(curr_elem.y - prev_elem.y) <= max(2, curr_elem.font_size * 0.15))
+                    for prev_elem, curr_elem in pairwise(elements)
+                ]
+                run_ids = accumulate(breaks, initial=0)
                 
-                for i in range(1, len(group.elements)):
-                    prev_elem = group.elements[i-1]
-                    curr_elem = group.elements[i]
-                    
-                    # Check if elements are consecutive and spatially close
-                    is_consecutive = (curr_elem.original_index - prev_elem.original_index <= 1)
-                    is_same_page = (curr_elem.page == prev_elem.page)
-                    spatial_threshold = max(2, curr_elem.font_size * 0.15)
-                    is_spatially_close = (abs(curr_elem.y - prev_elem.y) <= spatial_threshold)
-                    
-                    if is_consecutive and is_same_page and is_spatially_close:
-                        current_group.append(curr_elem)
+                # Merge each multi-element run into a single element
+                combined_elements = []
+                for _, run in groupby(zip(run_ids, elements), key=itemgetter(0)):
+                    run = [elem for _, elem in run]
+                    if len(run) > 1:
+                        combined_elements.append(self._combine_elements_into_one(run))
                     else:
-                        # Finalize current group and start new one
-                        if len(current_group) > 1:
-                            combined_elem = self._combine_elements_into_one(current_group)
-                            combined_elements.append(combined_elem)
-                        else:
-                            combined_elements.extend(current_group)
-                        
-                        current_group = [curr_elem]
-                
-                # Handle the last group
-                if len(current_group) > 1:
-                    combined_elem = self._combine_elements_into_one(current_group)
-                    combined_elements.append(combined_elem)
-                else:
-                    combined_elements.extend(current_group)
+                        combined_elements.extend(run)
                 
                 # Update the group's elements
                 if len(combined_elements) < len(group.elements):
-                    group.elements = combined_elements
+                    group.set_elements(combined_elements)
         
         except Exception:
             pass
@@ -682,7 +711,7 @@ class HeadingClassifier:
             return elements[0]
         
         # Sort by original index
-        elements.sort(key=lambda e: e.original_index)
+        elements.sort(key=attrgetter('original_index'))
         
         # Use the first element as base
         base_elem = elements[0]
@@ -692,7 +721,7 @@ class HeadingClassifier:
         
         # Create new combined element
         combined_element = TextElement(
-            text=combined_text,
+            text=combined_text.strip(),
             page=base_elem.page,
             font_size=base_elem.font_size,
             font=base_elem.font,
@@ -723,8 +752,8 @@ class HeadingClassifier:
             
             # Character composition analysis
             total_chars = len(text)
-            alpha_chars = sum(1 for c in text if c.isalpha())
-            digit_chars = sum(1 for c in text if c.isdigit())
+            alpha_chars = sum(map(str.isalpha, text))
+            digit_chars = sum(map(str.isdigit, text))
             
             # Must have reasonable proportion of alphabetic characters
             if alpha_chars < total_chars * 0.4:  # At least 40% letters
@@ -735,25 +764,12 @@ class HeadingClassifier:
                 return False
             
             # Pattern-based exclusions
-            patterns_to_exclude = [
-                r'^[0-9\s\-\.\/]+$',  # Only numbers, spaces, dashes, dots, slashes
-                r'^[A-Z]{3,}\s*[0-9]+$',  # Pattern like "ABC 123" or "FORM123"
-                r'^\d+[\.\-\s]*\d*$',  # Pure numeric patterns
-                r'^[^\w\s]{3,}$',  # Only special characters
-                r'.*\b(rev|version|ver|v)\s*[\d\.]+\b.*',  # Version numbers
-                r'.*\b\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4}\b.*',  # Dates
-                r'.*\b[A-Z]{2,}\-\d+\b.*',  # Code patterns like "ABC-123"
-                r'^(table|figure|chart|graph|image|photo)\s+\d+.*',  # Figure/table references
-                r'.*-{2,}.*',  # Text containing consecutive dashes
-            ]
-            
             text_lower = text.lower()
-            for pattern in patterns_to_exclude:
-                if re.match(pattern, text_lower, re.IGNORECASE):
-                    return False
+            if _TITLE_EXCLUDE_RE.match(text_lower):
+                return False
             
             # Word-based analysis
-            words = re.findall(r'\b[a-zA-Z]+\b', text)
+            words = _WORD_RE.findall(text)
             
             if not words:  # No valid words found
                 return False
@@ -762,30 +778,24 @@ class HeadingClassifier:
             if len(words) == 1 and len(words[0]) < 4:  # Single short word
                 return False
             
-            # Basic word pattern validation
-            common_english_words = {
-                'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-                'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
-                'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can',
-                'this', 'that', 'these', 'those', 'what', 'which', 'who', 'when', 'where', 'why', 'how',
-                'about', 'above', 'after', 'again', 'against', 'all', 'any', 'as', 'because', 'before',
-                'below', 'between', 'both', 'but', 'during', 'each', 'few', 'from', 'further',
-                'if', 'into', 'more', 'most', 'no', 'not', 'only', 'other', 'over', 'same', 'some',
-                'such', 'than', 'through', 'under', 'until', 'up', 'very', 'while', 'within', 'without'
-            }
-            
-            # Count recognizable words
-            recognizable_words = 0
-            for word in words:
-                word_lower = word.lower()
-                if (word_lower in common_english_words or 
-                    len(word) >= 3 or
-                    self._has_reasonable_letter_pattern(word)):
-                    recognizable_words += 1
-            
-            # At least 60% of words should be recognizable
-            if len(words) > 1 and recognizable_words / len(words) < 0.6:
-                return False
+            # At least 60% of words should be recognizable. Counting stops as
+            # soon as the outcome is settled either way; the length test comes
+            # first as it is the cheapest and covers most words.
+            word_count = len(words)
+            if word_count > 1:
+                recognizable_words = 0
+                unrecognizable_words = 0
+                for word in words:
+                    if (len(word) >= 3 or
+                        word.lower() in _COMMON_WORDS or
+                        self._has_reasonable_letter_pattern(word)):
+                        recognizable_words += 1
+                        if recognizable_words / word_count >= 0.6:
+                            break
+                    else:
+                        unrecognizable_words += 1
+                        if (word_count - unrecognizable_words) / word_count < 0.6:
+                            return False
             
             if self._looks_like_code_or_technical_id(text):
                 return False
@@ -797,34 +807,20 @@ class HeadingClassifier:
 
     def _has_reasonable_letter_pattern(self, word: str) -> bool:
         """Check if word has reasonable vowel-consonant patterns"""
-        if len(word) < 2:
+        # Only longer words need both vowels and consonants
+        if len(word) < 4:
             return True
         
-        vowels = set('aeiouAEIOU')
-        has_vowel = any(c in vowels for c in word)
-        has_consonant = any(c.isalpha() and c not in vowels for c in word)
-        
-        # Should have both vowels and consonants for longer words
-        if len(word) >= 4:
-            return has_vowel and has_consonant
-        
-        return True
+        letters = set(word)
+        has_vowel = not _VOWELS.isdisjoint(letters)
+        has_consonant = any(map(str.isalpha, letters - _VOWELS))
+        return has_vowel and has_consonant
 
     def _looks_like_code_or_technical_id(self, text: str) -> bool:
         """Check if text looks like code, IDs, or technical references"""
-        patterns = [
-            r'.*[a-zA-Z]+\d+[a-zA-Z]+\d+.*',  # Mixed letters and numbers pattern
-            r'.*\b[A-Z]{2,}_[A-Z0-9_]+\b.*',  # Underscore separated caps
-            r'.*\b[a-z]+[A-Z][a-z]*[A-Z].*',  # camelCase patterns
-            r'.*\b\w*[0-9]{3,}\w*\b.*',  # Words with 3+ consecutive digits
-            r'.*\b[A-F0-9]{8,}\b.*',  # Hex-like patterns
-        ]
-        
-        for pattern in patterns:
-            if re.match(pattern, text):
-                return True
-        
-        return False
+        # Searched in the first line only, as the former '.*'-prefixed
+        # patterns could not match past a newline
+        return _TECH_ID_RE.search(text.partition('\n')[0]) is not None
 
     def _reconstruct_title_text(self, elements: List['TextElement']) -> str:
         """Reconstruct complete title text from fragmented elements"""
@@ -851,14 +847,29 @@ class HeadingClassifier:
         if len(elements) <= 1:
             return elements
         
-        sorted_elements = sorted(elements, key=lambda e: e.original_index)
-        filtered_elements = []
+        # Kept elements in document order (None once evicted), indexed by a
+        # grid of 3x2 cells so that only elements in neighbouring cells need
+        # the overlap test below
+        kept = []
+        grid = {}
         
-        for current_elem in sorted_elements:
+        for current_elem in sorted(elements, key=attrgetter('original_index')):
             should_keep = True
             current_text = current_elem.text.strip()
+            cell_x = math.floor(current_elem.x / 3)
+            cell_y = math.floor(current_elem.y / 2)
+            
+            candidates = sorted(
+                i
+                for nx in (cell_x - 1, cell_x, cell_x + 1)
+                for ny in (cell_y - 1, cell_y, cell_y + 1)
+                for i in grid.get((nx, ny), ())
+            )
             
-            for existing_elem in filtered_elements:
+            for i in candidates:
+                existing_elem = kept[i]
+                if existing_elem is None:
+                    continue
                 existing_text = existing_elem.text.strip()
                 
                 # Check for spatial overlap
@@ -875,13 +886,14 @@ class HeadingClassifier:
                         should_keep = False
                         break
                     else:
-                        # Current text is longer, remove the existing shorter one
-                        filtered_elements.remove(existing_elem)
+                        # Current text is longer, evict the existing shorter one
+                        kept[i] = None
             
             if should_keep:
-                filtered_elements.append(current_elem)
+                grid.setdefault((cell_x, cell_y), []).append(len(kept))
+                kept.append(current_elem)
         
-        return filtered_elements
+        return [elem for elem in kept if elem is not None]
 
     def _reconstruct_by_overlap_analysis(self, elements: List['TextElement']) -> str:
         """Reconstruct text by analyzing overlapping fragments"""
@@ -889,7 +901,7 @@ class HeadingClassifier:
             return elements[0].text.strip() if elements else ""
         
         # Sort elements by their original index
-        sorted_elements = sorted(elements, key=lambda e: e.original_index)
+        sorted_elements = sorted(elements, key=attrgetter('original_index'))
         
         # Try to find the longest coherent sequence
         text_fragments = [elem.text.strip() for elem in sorted_elements if elem.text.strip()]
@@ -910,11 +922,8 @@ class HeadingClassifier:
         if len(fragments) == 1:
             return fragments[0]
         
-        # Remove exact duplicates first
-        unique_fragments = []
-        for frag in fragments:
-            if frag not in unique_fragments:
-                unique_fragments.append(frag)
+        # Remove exact duplicates first, keeping first occurrences in order
+        unique_fragments = list(dict.fromkeys(fragments))
         
         if len(unique_fragments) == 1:
             return unique_fragments[0]
@@ -924,21 +933,25 @@ class HeadingClassifier:
         
         # Start with the longest fragment
         result = unique_fragments[0]
+        result_lower = result.lower()
         
         for i in range(1, len(unique_fragments)):
             current_fragment = unique_fragments[i]
+            fragment_lower = current_fragment.lower()
             
             # Skip if current fragment is completely contained in result
-            if current_fragment.lower() in result.lower():
+            if fragment_lower in result_lower:
                 continue
             
             # Try to find overlap with the result
             merged = self._merge_two_fragments(result, current_fragment)
             if merged != result and len(merged) > len(result):  # Only accept if merge makes text longer
                 result = merged
-            elif not any(word.lower() in result.lower() for word in current_fragment.split() if len(word) > 2):
+                result_lower = result.lower()
+            elif not any(word.lower() in result_lower for word in current_fragment.split() if len(word) > 2):
                 # If no significant word overlap, append as continuation
                 result = result + " " + current_fragment
+                result_lower = result.lower()
         
         return result.strip()
 
@@ -946,71 +959,62 @@ class HeadingClassifier:
         """Try to merge two potentially overlapping fragments"""
         # Check for suffix-prefix overlap
         max_overlap = min(len(text1), len(text2)) // 2
-        
-        for overlap_len in range(max_overlap, 0, -1):
-            if text1[-overlap_len:].lower() == text2[:overlap_len].lower():
+        text1_lower = text1.lower()
+        text2_lower = text2.lower()
+        
+        if text1.isascii() and text2.isascii():
+            # ASCII lowercases one character at a time, so the lowered
+            # strings can be searched in one linear pass each
+            overlap_len = _suffix_prefix_overlap(text1_lower, text2_lower, max_overlap)
+            if overlap_len:
                 # Found overlap
-                merged = text1 + text2[overlap_len:]
-                return merged
-        
-        # Check for prefix-suffix overlap (reverse)
-        for overlap_len in range(max_overlap, 0, -1):
-            if text2[-overlap_len:].lower() == text1[:overlap_len].lower():
+                return text1 + text2[overlap_len:]
+            
+            # Check for prefix-suffix overlap (reverse)
+            overlap_len = _suffix_prefix_overlap(text2_lower, text1_lower, max_overlap)
+            if overlap_len:
                 # Found overlap
-                merged = text2 + text1[overlap_len:]
-                return merged
+                return text2 + text1[overlap_len:]
+        else:
+            # Elsewhere lowercasing can change length or depend on context
+            # (final sigma), so each slice is lowered on its own
+            for overlap_len in range(max_overlap, 0, -1):
+                if text1[-overlap_len:].lower() == text2[:overlap_len].lower():
+                    return text1 + text2[overlap_len:]
+            
+            for overlap_len in range(max_overlap, 0, -1):
+                if text2[-overlap_len:].lower() == text1[:overlap_len].lower():
+                    return text2 + text1[overlap_len:]
         
         # Check if one is contained in the other
-        if text1.lower() in text2.lower():
+        if text1_lower in text2_lower:
             return text2
-        elif text2.lower() in text1.lower():
+        elif text2_lower in text1_lower:
             return text1
         
         return text1  # No merge possible
 
     def _reconstruct_by_position(self, elements: List['TextElement']) -> str:
-        """Reconstruct text based on spatial positioning (if x,y coordinates available)"""
-        if not all(hasattr(elem, 'x') and hasattr(elem, 'y') for elem in elements):
-            return ""
-        
-        # Group elements by approximate y-position (same line)
-        lines = defaultdict(list)
-        
-        for elem in elements:
-            # Round y-position to group elements on the same line
-            line_key = round(elem.y / 10) * 10  # Group within 5 units
-            lines[line_key].append(elem)
-        
-        # Sort lines by y-position (top to bottom)
-        sorted_lines = sorted(lines.items(), key=lambda x: x[0])
-        
-        # For each line, sort elements by x-position (left to right)
-        line_texts = []
-        for y_pos, line_elements in sorted_lines:
-            line_elements.sort(key=lambda e: e.x)
-            line_text = " ".join(elem.text.strip() for elem in line_elements if elem.text.strip())
-            if line_text:
-                line_texts.append(line_text)
-        
-        # Combine lines
-        return " ".join(line_texts)
+        """Reconstruct text based on spatial positioning"""
+        # Order elements top to bottom by approximate line (y rounded to
+        # 10 units), then left to right. Lines and the elements within them
+        # are both joined with spaces, so one sort gives the whole text.
+        sorted_elements = sorted(elements, key=lambda e: (round(e.y / 10) * 10, e.x))
+        return " ".join(text for text in (elem.text.strip() for elem in sorted_elements) if text)
 
     def _simple_concatenation_with_dedup(self, elements: List['TextElement']) -> str:
         """Simple concatenation with basic deduplication"""
         if not elements:
             return ""
         
-        # Get unique text pieces in document order
-        seen_texts = set()
-        unique_texts = []
-        
-        for elem in sorted(elements, key=lambda e: e.original_index):
-            text = elem.text.strip()
-            if text and text not in seen_texts:
-                unique_texts.append(text)
-                seen_texts.add(text)
+        # Elements from _remove_overlapping_elements are already in document
+        # order, in which case the sort is skipped
+        if any(a.original_index > b.original_index for a, b in pairwise(elements)):
+            elements = sorted(elements, key=attrgetter('original_index'))
         
-        return " ".join(unique_texts)
+        # Get unique text pieces in document order
+        texts = (elem.text.strip() for elem in elements)
+        return " ".join(dict.fromkeys(text for text in texts if text))
 
     def _determine_hierarchy(self):
         """Initial hierarchy determination - will be reassigned after title identification"""
@@ -1019,7 +1023,7 @@ class HeadingClassifier:
                 return
             
             # Sort groups by priority score (descending - highest priority first)
-            sorted_groups = sorted(self.groups, key=lambda g: g.get_priority_score(), reverse=True)
+            sorted_groups = sorted(self.groups, key=methodcaller('get_priority_score'), reverse=True)
             
             # Assign TEMPORARY levels (these will be reassigned after title identification)
             level_names = ['TEMP1', 'TEMP2', 'TEMP3', 'TEMP4', 'TEMP5']
@@ -1045,21 +1049,25 @@ class HeadingClassifier:
                 self.title_elements = []
                 return
             
-            # Sort groups by score in descending order (highest first)
-            sorted_groups = sorted(self.groups, key=lambda g: g.get_priority_score(), reverse=True)
+            # Sort groups by score in descending order (highest first). They
+            # are usually in that order already, from _determine_hierarchy,
+            # which makes this a single linear pass, but its fallback leaves
+            # them unsorted.
+            sorted_groups = sorted(self.groups, key=methodcaller('get_priority_score'), reverse=True)
             
             # Check each group starting from highest score
             title_found = False
-            for i, group in enumerate(sorted_groups):
-                score = group.get_priority_score()
-                
+            for group in sorted_groups:
                 # Get all elements from this group
                 group_elements = group.elements
                 if not group_elements:
                     continue
                     
-                # Check if this group appears on a single page
-                pages_in_group = set(elem.page for elem in group_elements)
+                # Prefer titles that appear early in document (first few pages).
+                # Checked first as it is much cheaper than reconstructing the text.
+                earliest_page = min(elem.page for elem in group_elements)
+                if earliest_page > 3:  # First 3 pages only
+                    continue
                 
                 # Reconstruct text from this group
                 reconstructed_title = self._reconstruct_title_text(group_elements)
@@ -1071,11 +1079,6 @@ class HeadingClassifier:
                 if not self._is_valid_title_text(reconstructed_title):
                     continue
                 
-                # Prefer titles that appear early in document (first few pages)
-                earliest_page = min(pages_in_group)
-                if earliest_page > 3:  # First 3 pages only
-                    continue
-                
                 # Prefer shorter titles (reasonable length)
                 if len(reconstructed_title) > 150:
                     continue
@@ -1102,23 +1105,23 @@ class HeadingClassifier:
             if not self.groups:
                 return
             
-            # Count all heading texts across all groups
-            text_count = defaultdict(list)  # text -> list of (group, element) pairs
+            # Normalize each heading text once; only actual headings are checked
+            heading_groups = [
+                group for group in self.groups
+                if group.level not in ['TITLE', 'EXCLUDED']
+            ]
+            normalized_texts = [
+                [' '.join(element.text.lower().split()) for element in group.elements]
+                for group in heading_groups
+            ]
             
-            for group in self.groups:
-                if group.level not in ['TITLE', 'EXCLUDED']:  # Only check actual headings
-                    for element in group.elements:
-                        # Normalize text for comparison
-                        normalized_text = ' '.join(element.text.strip().lower().split())
-                        
-                        if normalized_text and len(normalized_text) > 2:  # Skip very short texts
-                            text_count[normalized_text].append((group, element))
+            # Count all heading texts across all groups, skipping very short texts
+            text_count = Counter(
+                text for texts in normalized_texts for text in texts if len(text) > 2
+            )
             
             # Identify texts that appear more than 5 times
-            texts_to_remove = set()
-            for normalized_text, group_element_pairs in text_count.items():
-                if len(group_element_pairs) > 5:
-                    texts_to_remove.add(normalized_text)
+            texts_to_remove = {text for text, count in text_count.items() if count > 5}
             
             if not texts_to_remove:
                 return
@@ -1126,22 +1129,16 @@ class HeadingClassifier:
             # Remove specific elements (not entire groups)
             empty_groups = []
             
-            for group in self.groups:
-                if group.level not in ['TITLE', 'EXCLUDED']:
-                    # Filter out elements with repeating text
-                    new_elements = []
-                    for element in group.elements:
-                        normalized_text = ' '.join(element.text.strip().lower().split())
-                        
-                        if normalized_text not in texts_to_remove:
-                            new_elements.append(element)
-                    
-                    # Update group with filtered elements
-                    group.elements = new_elements
-                    
-                    # Track groups that became empty
-                    if len(group.elements) == 0:
-                        empty_groups.append(group)
+            for group, texts in zip(heading_groups, normalized_texts):
+                # Filter out elements with repeating text
+                group.set_elements([
+                    element for element, text in zip(group.elements, texts)
+                    if text not in texts_to_remove
+                ])
+                
+                # Track groups that became empty
+                if len(group.elements) == 0:
+                    empty_groups.append(group)
             
             # Remove groups that became completely empty
             if empty_groups:
@@ -1153,33 +1150,37 @@ class HeadingClassifier:
     def _reassign_hierarchy_after_title(self):
         """Smart hierarchy assignment with 10-point score brackets and exclusion rules"""
         try:
-            # Separate title groups from non-title groups
-            title_groups = [g for g in self.groups if g.level == 'TITLE']
-            non_title_groups = [g for g in self.groups if g.level != 'TITLE']
+            # Separate title groups from non-title groups in one pass
+            title_groups = []
+            non_title_groups = []
+            for group in self.groups:
+                if group.level == 'TITLE':
+                    title_groups.append(group)
+                else:
+                    non_title_groups.append(group)
             
             if not non_title_groups:
                 return
             
             # Get all scores and create brackets
-            all_scores = []
-            score_to_groups = defaultdict(list)
+            score_to_groups = {}
             for group in non_title_groups:
-                score = group.get_priority_score()
-                all_scores.append(score)
-                score_to_groups[score].append(group)
+                score_to_groups.setdefault(group.get_priority_score(), []).append(group)
             
-            # Sort scores in descending order
-            all_scores = sorted(set(all_scores), reverse=True)
+            # Sort scores in descending order, with the groups of each score
+            # in a list aligned to them
+            all_scores = sorted(score_to_groups, reverse=True)
+            score_groups = [score_to_groups[score] for score in all_scores]
             
             # Create score brackets with 15-point ranges
-            brackets = self._create_score_brackets(all_scores)
+            initial_brackets = self._create_score_brackets(all_scores, score_groups)
+            original_bracket_count = len(initial_brackets)
             
             # Apply absolute exclusion rule (exclude brackets with >40 entries)
-            brackets = self._apply_absolute_exclusion_rule(brackets, score_to_groups, max_entries_threshold=40)
+            brackets = self._apply_absolute_exclusion_rule(initial_brackets, max_entries_threshold=40)
             
             # Apply hierarchy rules based on number of brackets (after exclusion)
             num_brackets = len(brackets)
-            original_bracket_count = len(self._create_score_brackets(all_scores))
 
             if num_brackets == 0:
                 # No brackets left after exclusion
@@ -1192,47 +1193,47 @@ class HeadingClassifier:
                     for group in non_title_groups:
                         group.level = 'EXCLUDED'
                 else:
-                    self._assign_bracket_to_level(brackets[0], score_to_groups, 'H1')
+                    self._assign_bracket_to_level(brackets[0], 'H1')
                     
             elif num_brackets == 2:
                 # Two brackets: H1 and conditional H2
-                self._assign_bracket_to_level(brackets[0], score_to_groups, 'H1')
+                self._assign_bracket_to_level(brackets[0], 'H1')
                 
                 # Check if second bracket should be included
-                should_include = self._should_include_bracket(brackets[1], score_to_groups)
+                should_include = self._should_include_bracket(brackets[1])
                 if should_include:
-                    self._assign_bracket_to_level(brackets[1], score_to_groups, 'H2')
+                    self._assign_bracket_to_level(brackets[1], 'H2')
                 else:
-                    self._assign_bracket_to_level(brackets[1], score_to_groups, 'EXCLUDED')
+                    self._assign_bracket_to_level(brackets[1], 'EXCLUDED')
                     
             elif num_brackets == 3:
                 # Three brackets: H1, H2, and conditional H3
-                self._assign_bracket_to_level(brackets[0], score_to_groups, 'H1')
-                self._assign_bracket_to_level(brackets[1], score_to_groups, 'H2')
+                self._assign_bracket_to_level(brackets[0], 'H1')
+                self._assign_bracket_to_level(brackets[1], 'H2')
                 
                 # Check if third bracket should be included
-                should_include = self._should_include_bracket(brackets[2], score_to_groups)
+                should_include = self._should_include_bracket(brackets[2])
                 if should_include:
-                    self._assign_bracket_to_level(brackets[2], score_to_groups, 'H3')
+                    self._assign_bracket_to_level(brackets[2], 'H3')
                 else:
-                    self._assign_bracket_to_level(brackets[2], score_to_groups, 'EXCLUDED')
+                    self._assign_bracket_to_level(brackets[2], 'EXCLUDED')
                     
             else:  # num_brackets >= 4
                 # Four or more brackets: Use top 3, exclude rest
                 # Assign top 3 brackets
-                self._assign_bracket_to_level(brackets[0], score_to_groups, 'H1')
-                self._assign_bracket_to_level(brackets[1], score_to_groups, 'H2')
+                self._assign_bracket_to_level(brackets[0], 'H1')
+                self._assign_bracket_to_level(brackets[1], 'H2')
                 
                 # Check if third bracket should be included
-                should_include = self._should_include_bracket(brackets[2], score_to_groups)
+                should_include = self._should_include_bracket(brackets[2])
                 if should_include:
-                    self._assign_bracket_to_level(brackets[2], score_to_groups, 'H3')
+                    self._assign_bracket_to_level(brackets[2], 'H3')
                 else:
-                    self._assign_bracket_to_level(brackets[2], score_to_groups, 'EXCLUDED')
+                    self._assign_bracket_to_level(brackets[2], 'EXCLUDED')
                 
                 # Exclude all remaining brackets
                 for i in range(3, num_brackets):
-                    self._assign_bracket_to_level(brackets[i], score_to_groups, 'EXCLUDED')
+                    self._assign_bracket_to_level(brackets[i], 'EXCLUDED')
             
             # Update groups list - only include non-excluded groups
             valid_groups = title_groups + [g for g in non_title_groups if g.level != 'EXCLUDED']
@@ -1241,11 +1242,23 @@ class HeadingClassifier:
         except Exception:
             pass
 
-    def _create_score_brackets(self, sorted_scores):
-        """Create score brackets with 15-point ranges"""
+    def _create_score_brackets(self, sorted_scores, score_groups):
+        """Create score brackets with 15-point ranges
+
+        score_groups[i] lists the groups scoring sorted_scores[i]; each
+        bracket carries the groups of its scores in score order and their
+        total element count.
+        """
         if not sorted_scores:
             return []
         
+        # Running element totals over the scores, so each bracket's count is
+        # a difference of two prefix sums
+        entry_totals = list(accumulate(
+            (sum(len(group.elements) for group in groups) for groups in score_groups),
+            initial=0
+        ))
+        
         brackets = []
         i = 0
         
@@ -1254,46 +1267,35 @@ class HeadingClassifier:
             bracket_start = sorted_scores[i]
             bracket_end = bracket_start - 15
             
-            # Find all scores that fall within this bracket
-            bracket_scores = []
-            while i < len(sorted_scores) and sorted_scores[i] >= bracket_end:
-                bracket_scores.append(sorted_scores[i])
-                i += 1
+            # Find all scores that fall within this bracket. Scores are sorted
+            # descending, so they form a run found by binary search on the
+            # negated (ascending) scores.
+            j = bisect_right(sorted_scores, -bracket_end, lo=i, key=neg)
             
             brackets.append({
                 'range': (bracket_start, bracket_end),
-                'scores': bracket_scores
+                'scores': sorted_scores[i:j],
+                'groups': list(chain.from_iterable(score_groups[i:j])),
+                'entries': entry_totals[j] - entry_totals[i]
             })
+            i = j
         
         return brackets
 
-    def _apply_absolute_exclusion_rule(self, brackets, score_to_groups, max_entries_threshold=40):
+    def _apply_absolute_exclusion_rule(self, brackets, max_entries_threshold=40):
         """Apply absolute exclusion rule: exclude any bracket with more than max_entries_threshold entries"""
         try:
             if not brackets:
                 return brackets
             
-            # Calculate entries per bracket
-            bracket_entry_counts = []
-
-            for bracket in brackets:
-                bracket_entries = 0
-                for score in bracket['scores']:
-                    for group in score_to_groups[score]:
-                        bracket_entries += len(group.elements)
-                bracket_entry_counts.append(bracket_entries)
-            
             # Filter brackets based on absolute threshold
             filtered_brackets = []
             
-            for i, bracket in enumerate(brackets):
-                bracket_entries = bracket_entry_counts[i]
-                
-                if bracket_entries > max_entries_threshold:
+            for bracket in brackets:
+                if bracket['entries'] > max_entries_threshold:
                     # Mark groups in this bracket as excluded
-                    for score in bracket['scores']:
-                        for group in score_to_groups[score]:
-                            group.level = 'EXCLUDED'
+                    for group in bracket['groups']:
+                        group.level = 'EXCLUDED'
                 else:
                     filtered_brackets.append(bracket)
             
@@ -1302,21 +1304,15 @@ class HeadingClassifier:
         except Exception:
             return brackets
 
-    def _assign_bracket_to_level(self, bracket, score_to_groups, level):
+    def _assign_bracket_to_level(self, bracket, level):
         """Assign all groups in a bracket to a specific level"""
-        for score in bracket['scores']:
-            for group in score_to_groups[score]:
-                group.level = level
+        for group in bracket['groups']:
+            group.level = level
 
-    def _should_include_bracket(self, bracket, score_to_groups):
+    def _should_include_bracket(self, bracket):
         """Check if a bracket should be included based on text length"""
-        # Get all groups in this bracket
-        bracket_groups = []
-        for score in bracket['scores']:
-            bracket_groups.extend(score_to_groups[score])
-        
-        # Apply the same text length logic
-        return self._should_include_lowest_score(bracket_groups, self.max_text_length_for_lowest)
+        # Apply the same text length logic to all groups in this bracket
+        return self._should_include_lowest_score(bracket['groups'], self.max_text_length_for_lowest)
 
     def _should_include_lowest_score(self, lowest_score_groups, max_text_length=50):
         """Check if lowest score groups should be included based on text length"""
@@ -1347,34 +1343,33 @@ class HeadingClassifier:
             # Define allowed heading levels
             allowed_levels = {'H1', 'H2', 'H3', 'H4', 'H5', 'H6'}
             
-            # Collect all elements with their levels
+            # Collect all elements with their levels, leaving out title and
+            # empty elements before sorting. Element text is stripped when
+            # elements are built, so it is used as is.
             all_elements = []
             
             for group in self.groups:
                 # Only include groups with allowed levels
                 if group.level in allowed_levels:
                     for element in group.elements:
-                        all_elements.append((element, group.level))
+                        # Skip if this element was used in title construction
+                        if element.original_index in title_indices:
+                            continue
+                        
+                        # Skip empty elements
+                        if not element.text:
+                            continue
+                        
+                        all_elements.append(((element.page, element.original_index), element, group.level))
             
             # Sort by page and original index to maintain document order
-            all_elements.sort(key=lambda x: (x[0].page, x[0].original_index))
+            all_elements.sort(key=itemgetter(0))
             
             # Create outline entries
-            for element, level in all_elements:
-                # Skip if this element was used in title construction
-                if element.original_index in title_indices:
-                    continue
-                
-                # Skip empty elements
-                element_text = element.text.strip()
-                if not element_text:
-                    continue
-
-                self.outline.append({
-                    "level": level,
-                    "text": element_text,
-                    "page": element.page,
-                })
+            self.outline = [
+                OutlineEntry(level, element.text, element.page)
+                for _, element, level in all_elements
+            ]
             
             # Apply comprehensive title and hierarchy order correction
             self._correct_title_and_hierarchy_order()
@@ -1393,31 +1388,29 @@ class HeadingClassifier:
             
             if self.title and self.title_elements:
                 # Get the position of title elements in the original document
-                title_positions = [elem.original_index for elem in self.title_elements]
-                min_title_position = min(title_positions) if title_positions else float('inf')
-                
-                # Check all outline entries (headings) positions
-                heading_before_title = []
+                min_title_position = min(
+                    (elem.original_index for elem in self.title_elements), default=float('inf')
+                )
                 
-                for entry in self.outline:
-                    # Find the original elements that correspond to this outline entry
-                    for group in self.groups:
-                        if group.level == entry['level']:
-                            for element in group.elements:
-                                if (element.text.strip() == entry['text'].strip() and 
-                                    element.page == entry['page']):
-                                    
-                                    if element.original_index < min_title_position:
-                                        heading_before_title.append({
-                                            'text': entry['text'],
-                                            'level': entry['level'],
-                                            'position': element.original_index,
-                                            'page': element.page
-                                        })
+                # Earliest original position of each (level, text, page), so
+                # outline entries are matched to their elements by lookup
+                earliest_positions = {}
+                for group in self.groups:
+                    for element in group.elements:
+                        key = (group.level, element.text.strip(), element.page)
+                        position = earliest_positions.get(key)
+                        if position is None or element.original_index < position:
+                            earliest_positions[key] = element.original_index
                 
-                # If ANY heading appears before title in document order, correction is needed
-                if heading_before_title:
-                    title_needs_correction = True
+                # If ANY heading appears before title in document order,
+                # correction is needed; stop at the first one found
+                no_position = float('inf')
+                title_needs_correction = any(
+                    earliest_positions.get(
+                        (entry.level, entry.text.strip(), entry.page), no_position
+                    ) < min_title_position
+                    for entry in self.outline
+                )
             
             # Apply title correction if needed
             if title_needs_correction:
@@ -1429,11 +1422,11 @@ class HeadingClassifier:
                 if self.title_elements:
                     # Create a new outline entry for the former title
                     title_element = self.title_elements[0]  # Use first title element
-                    new_title_entry = {
-                        "level": "H1",  # Former title becomes H1
-                        "text": original_title,
-                        "page": title_element.page,                        
-                    }
+                    new_title_entry = OutlineEntry(
+                        "H1",  # Former title becomes H1
+                        original_title,
+                        title_element.page,
+                    )
                     
                     # Insert at the beginning of outline
                     self.outline.insert(0, new_title_entry)
@@ -1443,7 +1436,7 @@ class HeadingClassifier:
             seen_levels = set()
             
             for entry in self.outline:
-                level = entry['level']
+                level = entry.level
                 if level not in seen_levels and level != 'TITLE':  # Skip TITLE level
                     unique_levels.append(level)
                     seen_levels.add(level)
@@ -1474,12 +1467,12 @@ class HeadingClassifier:
                 
                 # Apply the mapping to all outline entries
                 for entry in self.outline:
-                    if entry['level'] in level_mapping:
-                        original_level = entry['level']
+                    if entry.level in level_mapping:
+                        original_level = entry.level
                         new_level = level_mapping[original_level]
                         
                         if new_level != original_level:
-                            entry['level'] = new_level
+                            entry.level = new_level
             
         except Exception:
             pass
@@ -1539,12 +1532,9 @@ class HeadingClassifier:
     def _generate_output(self) -> Dict[str, Any]:
         """Generate the final output dictionary"""
         try:
-            # Final duplicate check on outline
-            self._verify_no_duplicates_in_outline()
-            
             output = {
                 "title": self.title if self.title else "",
-                "outline": self.outline
+                "outline": [entry.to_dict() for entry in self.outline]
             }
             
             return output
@@ -1552,21 +1542,6 @@ class HeadingClassifier:
         except Exception as e:
             return self._create_error_output(f"Failed to generate output: {str(e)}")
 
-    def _verify_no_duplicates_in_outline(self):
-        """Final verification - check for any remaining duplicates"""
-        try:
-            seen_texts = defaultdict(int)
-            
-            for entry in self.outline:
-                normalized_text = entry["text"].strip().lower()
-                seen_texts[normalized_text] += 1
-            
-            # Optional: could implement removal logic here if needed
-            # Currently just verifies without removing
-            
-        except Exception as e:
-            pass  # Fail silently to avoid disrupting output generation
-
     def _create_error_output(self, error_message: str) -> Dict[str, Any]:
         """Create standardized error output format"""
         return {
@@ -1595,6 +1570,8 @@ def classify_headings(input_data: List[Dict[str, Any]]) -> Dict[str, Any]:
                 }
             ]
         }
+        Both keys are always present; an "error" message is added when
+        processing fails or finds nothing to classify.
     """
     try:
         classifier = HeadingClassifier()
@@ -1617,6 +1594,10 @@ def save_output(result: Dict[str, Any], filename: str = "output-learn-acrobat-2-
         filename: Output filename (default: "output-learn-acrobat-2-exp.json")
     """
     try:
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+            return
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(result, f, indent=4, ensure_ascii=False)
         
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import fitz  # PyMuPDF
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SECTIONS = ["Introduction", "Background", "Methods", "Results", "Discussion", "Summary"]
+
+
+def make_pdf(path, pages=1):
+    """Write a PDF with a title, one chapter per page and two numbered sections each."""
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page()
+        y = 72
+        if page_num == 1:
+            page.insert_text((150, y), "Program Overview", fontsize=26, fontname="hebo")
+            y += 50
+        page.insert_text((72, y), f"Chapter {page_num} {SECTIONS[page_num % len(SECTIONS)]}",
+                         fontsize=18, fontname="hebo")
+        y += 30
+        for number, section in enumerate(("Goals", "Structure"), start=1):
+            page.insert_text((72, y), f"{page_num}.{number} {section}", fontsize=14, fontname="hebo")
+            y += 24
+            for _ in range(8):
+                page.insert_text((72, y), "This section is for students and the school program "
+                                 "with results and methods.", fontsize=10, fontname="helv")
+                y += 15
+            y += 10
+    doc.save(path)
+    doc.close()
+    return path
+
+
+# A PDF whose page tree promises pages it does not contain. PyMuPDF opens
+# it but raises a plain RuntimeError ("Invalid number of pages") rather than
+# FileDataError once the pages are read.
+DAMAGED_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 5>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n"
+    b"%%EOF"
+)
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    """Input directory holding a few generated PDFs."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    make_pdf(str(input_dir / "short.pdf"), pages=2)
+    make_pdf(str(input_dir / "medium.pdf"), pages=5)
+    return input_dir
+
+
+@pytest.fixture
+def long_pdf(tmp_path):
+    """A PDF longer than one extraction chunk (PAGE_CHUNK_SIZE pages)."""
+    return make_pdf(str(tmp_path / "long.pdf"), pages=30)
@@ -0,0 +1,127 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import kraken
+from text_extraction import PAGE_CHUNK_SIZE, PDFLineExtractor
+
+from conftest import DAMAGED_PDF, make_pdf
+
+
+def fork_pool(workers=2):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+
+
+def test_damaged_pdf_yields_empty_outline(tmp_path):
+    path = tmp_path / "damaged.pdf"
+    path.write_bytes(DAMAGED_PDF)
+
+    assert kraken.extract_outline(str(path)) == {"title": "", "outline": []}
+    assert kraken.extract_outline_from_bytes(DAMAGED_PDF) == {"title": "", "outline": []}
+
+
+def test_non_pdf_yields_empty_outline(tmp_path):
+    path = tmp_path / "notes.pdf"
+    path.write_bytes(b"plain text, not a PDF")
+
+    assert kraken.extract_outline(str(path)) == {"title": "", "outline": []}
+
+
+def test_unexpected_runtime_errors_propagate(monkeypatch, tmp_path):
+    path = make_pdf(str(tmp_path / "doc.pdf"), pages=1)
+
+    for error in (RecursionError, NotImplementedError):
+        def fail(lines):
+            raise error("bug")
+
+        monkeypatch.setattr(kraken, "classify_headings", fail)
+        with pytest.raises(error):
+            kraken.extract_outline(path)
+
+
+def test_outline_of_generated_pdf(tmp_path):
+    path = make_pdf(str(tmp_path / "doc.pdf"), pages=2)
+
+    outline = kraken.extract_outline(path)
+
+    assert outline["title"] == "Program Overview"
+    assert [(entry["level"], entry["text"]) for entry in outline["outline"]] == [
+        ("H1", "Chapter 1 Background"), ("H2", "1.1 Goals"), ("H2", "1.2 Structure"),
+        ("H1", "Chapter 2 Methods"), ("H2", "2.1 Goals"), ("H2", "2.2 Structure"),
+    ]
+
+
+def cached_files(cache_dir):
+    return sorted(cache_dir.glob("*.json"))
+
+
+def test_cache_serves_stored_outline(tmp_path):
+    path = make_pdf(str(tmp_path / "doc.pdf"), pages=2)
+    cache_dir = tmp_path / "cache"
+
+    outline = kraken.extract_outline(path, str(cache_dir))
+    [cache_file] = cached_files(cache_dir)
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == outline
+
+    # A second run is answered from the cache rather than re-parsed
+    cache_file.write_text(json.dumps({"title": "cached", "outline": []}), encoding="utf-8")
+    assert kraken.extract_outline(path, str(cache_dir)) == {"title": "cached", "outline": []}
+
+
+def test_cache_version_change_invalidates_entries(tmp_path, monkeypatch):
+    path = make_pdf(str(tmp_path / "doc.pdf"), pages=2)
+    cache_dir = tmp_path / "cache"
+
+    outline = kraken.extract_outline(path, str(cache_dir))
+    [cache_file] = cached_files(cache_dir)
+    cache_file.write_text(json.dumps({"title": "stale", "outline": []}), encoding="utf-8")
+
+    monkeypatch.setattr(kraken, "CACHE_VERSION", kraken.CACHE_VERSION + 1)
+
+    assert kraken.extract_outline(path, str(cache_dir)) == outline
+    assert len(cached_files(cache_dir)) == 2
+
+
+def test_cache_key_depends_on_dictionary_backend(monkeypatch):
+    key = kraken._content_key(b"%PDF-1.4 contents")
+
+    monkeypatch.setattr(kraken.structure_analysis, "DICTIONARY_BACKEND", "other")
+
+    assert kraken._content_key(b"%PDF-1.4 contents") != key
+
+
+def test_max_pages_defers_long_documents(tmp_path, long_pdf):
+    cache_dir = tmp_path / "cache"
+
+    deferred = kraken.extract_outline(long_pdf, str(cache_dir), max_pages=PAGE_CHUNK_SIZE)
+    assert isinstance(deferred, kraken.DeferredDocument)
+    assert deferred.page_count == 30
+    assert cached_files(cache_dir) == []
+
+    # The deferred document is extracted in chunks and cached under the
+    # key computed when it was first opened
+    with fork_pool() as executor:
+        outline = kraken.extract_deferred(long_pdf, deferred, executor)
+    assert outline == kraken.extract_outline(long_pdf)
+    assert [str(path) for path in cached_files(cache_dir)] == [deferred.cache_path]
+
+    # Once cached, the outline is served whatever the length
+    assert kraken.extract_outline(long_pdf, str(cache_dir), max_pages=PAGE_CHUNK_SIZE) == outline
+
+
+def test_chunked_extraction_matches_serial(long_pdf):
+    with PDFLineExtractor(long_pdf) as extractor:
+        serial_lines = extractor.extract_text_lines()
+    serial_outline = kraken.extract_outline(long_pdf)
+
+    with fork_pool() as executor:
+        with PDFLineExtractor(long_pdf) as extractor:
+            chunked_lines = extractor.extract_text_lines(executor)
+        chunked_outline = kraken.extract_outline(long_pdf, executor=executor)
+
+    assert chunked_lines == serial_lines
+    assert {line["page"] for line in chunked_lines} == set(range(1, 31))
+    assert chunked_outline == serial_outline
+    assert serial_outline["outline"]
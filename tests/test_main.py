@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+
+import kraken
+import main
+
+from conftest import DAMAGED_PDF
+
+
+def run_main(monkeypatch, input_dir, output_dir, workers=1, mode="json"):
+    monkeypatch.setattr(main, "INPUT_DIR", str(input_dir))
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(output_dir))
+    monkeypatch.setattr(main, "OUTPUT_MODE", mode)
+    monkeypatch.setenv("KRAKEN_WORKERS", str(workers))
+    assert main.main() == 0
+
+
+def test_damaged_pdf_writes_empty_outline(monkeypatch, pdf_dir, tmp_path):
+    (pdf_dir / "damaged.pdf").write_bytes(DAMAGED_PDF)
+
+    for workers in (1, 2):
+        output_dir = tmp_path / f"output{workers}"
+        run_main(monkeypatch, pdf_dir, output_dir, workers=workers)
+
+        with open(output_dir / "damaged.json", encoding="utf-8") as f:
+            assert json.load(f) == {"title": "", "outline": []}
+        assert (output_dir / "short.json").exists()
+
+
+def test_unreadable_pdf_writes_no_output(monkeypatch, pdf_dir, tmp_path):
+    (pdf_dir / "locked.pdf").write_bytes(b"%PDF-1.4\n")
+    read_pdf = kraken.read_pdf
+
+    def deny_locked(path):
+        if path.endswith("locked.pdf"):
+            raise PermissionError(13, "Permission denied", path)
+        return read_pdf(path)
+
+    monkeypatch.setattr(kraken, "read_pdf", deny_locked)
+
+    # Serial and parallel runs both log the file and skip it
+    for workers in (1, 2):
+        output_dir = tmp_path / f"output{workers}"
+        run_main(monkeypatch, pdf_dir, output_dir, workers=workers)
+
+        assert not (output_dir / "locked.json").exists()
+        assert (output_dir / "short.json").exists()
+
+
+def read_outputs(output_dir):
+    outputs = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith(".json"):
+            with open(output_dir / name, encoding="utf-8") as f:
+                outputs[name] = json.load(f)
+    return outputs
+
+
+def test_serial_and_parallel_outputs_match(monkeypatch, pdf_dir, tmp_path):
+    run_main(monkeypatch, pdf_dir, tmp_path / "serial", workers=1)
+    run_main(monkeypatch, pdf_dir, tmp_path / "parallel", workers=2)
+
+    serial = read_outputs(tmp_path / "serial")
+    assert sorted(serial) == ["medium.json", "short.json"]
+    assert serial == read_outputs(tmp_path / "parallel")
+
+
+def test_long_pdf_outputs_match(monkeypatch, pdf_dir, long_pdf, tmp_path):
+    shutil.copy(long_pdf, pdf_dir / "long.pdf")
+
+    run_main(monkeypatch, pdf_dir, tmp_path / "serial", workers=1)
+    run_main(monkeypatch, pdf_dir, tmp_path / "parallel", workers=2)
+
+    serial = read_outputs(tmp_path / "serial")
+    assert sorted(serial) == ["long.json", "medium.json", "short.json"]
+    assert serial == read_outputs(tmp_path / "parallel")
+
+    # With the outputs removed, a second parallel run is served from the
+    # cache in the output directory and gives the same result
+    for name in serial:
+        os.remove(tmp_path / "parallel" / name)
+    assert len(os.listdir(tmp_path / "parallel" / main.CACHE_DIRNAME)) == 3
+    run_main(monkeypatch, pdf_dir, tmp_path / "parallel", workers=2)
+    assert serial == read_outputs(tmp_path / "parallel")
+
+
+def test_ndjson_output(monkeypatch, pdf_dir, tmp_path):
+    run_main(monkeypatch, pdf_dir, tmp_path / "json")
+    run_main(monkeypatch, pdf_dir, tmp_path / "ndjson", mode="ndjson")
+
+    with open(tmp_path / "ndjson" / main.NDJSON_FILENAME, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    per_file = read_outputs(tmp_path / "json")
+    assert sorted(record["file"] for record in records) == ["medium.pdf", "short.pdf"]
+    for record in records:
+        pdf = record.pop("file")
+        assert record == per_file[pdf.replace(".pdf", ".json")]
+
+
+def test_up_to_date_outputs_are_skipped(monkeypatch, pdf_dir, tmp_path):
+    output_dir = tmp_path / "output"
+    run_main(monkeypatch, pdf_dir, output_dir)
+
+    marker = {"title": "kept", "outline": []}
+    (output_dir / "short.json").write_text(json.dumps(marker), encoding="utf-8")
+    # A PDF newer than its output is processed again
+    stat = os.stat(output_dir / "medium.json")
+    os.utime(pdf_dir / "medium.pdf", (stat.st_atime, stat.st_mtime + 10))
+    (output_dir / "medium.json").write_text(json.dumps(marker), encoding="utf-8")
+    os.utime(output_dir / "medium.json", (stat.st_atime, stat.st_mtime))
+
+    run_main(monkeypatch, pdf_dir, output_dir)
+
+    outputs = read_outputs(output_dir)
+    assert outputs["short.json"] == marker
+    assert outputs["medium.json"] != marker
+
+
+def test_worker_count(monkeypatch):
+    monkeypatch.setenv("KRAKEN_WORKERS", "3")
+    assert main.get_worker_count() == 3
+
+    monkeypatch.setenv("KRAKEN_WORKERS", "0")
+    assert main.get_worker_count() == 1
+
+    monkeypatch.setenv("KRAKEN_WORKERS", "many")
+    assert main.get_worker_count() == (os.cpu_count() or 1)
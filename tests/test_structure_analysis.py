@@ -0,0 +1,29 @@
+import random
+
+from structure_analysis import HeaderFooterDetector, HeadingClassifier, TextElement
+
+
+def test_main_font_size_tie_break_matches_max_over_set():
+    # Long, plain lines in the header zone are headers exactly when their
+    # font is smaller than the page's main size, which makes it observable
+    detector = HeaderFooterDetector()
+    text = "A long line of running text that is not a page number at all"
+    rng = random.Random(0)
+    for _ in range(500):
+        sizes = [rng.choice([8.0, 9.5, 10.0, 11.0, 12.0, 14.0, 18.0])
+                 for _ in range(rng.randint(1, 20))]
+        elements = [TextElement(text=text, font_size=size, original_index=i, y=10.0)
+                    for i, size in enumerate(sizes)]
+
+        headers, _, _ = detector._detect_combined(elements)
+
+        main_font_size = max(set(sizes), key=sizes.count)
+        assert headers == [e for e in elements if e.font_size < main_font_size * 0.85]
+
+
+def test_fragment_word_filter_uses_original_word_length():
+    # 'İs'.lower() is three code points long, but the two-letter word is not
+    # significant, so only "Bar" is looked for and the fragment is appended
+    classifier = HeadingClassifier()
+    merged = classifier._merge_overlapping_fragments(["Overview İs Ready", "İs Bar"])
+    assert merged == "Overview İs Ready İs Bar"
@@ -1,25 +1,105 @@
 import fitz  # PyMuPDF
 import json
-from typing import List, Dict, Any
+from itertools import chain
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Same flags as page.get_text("dict") but without image blocks, which are
+# never used and otherwise carry the decoded image bytes. Without images
+# MuPDF no longer splits text lines around them.
+TEXTPAGE_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Line fields rounded to 2 decimals when lines are saved to a file
+ROUNDED_FIELDS = ("x0", "y0", "x1", "y1", "space_above", "space_below")
+
+# Span flag bit reported as "is_underlined". PyMuPDF has no underline flag;
+# this is the serifed-font bit (TEXT_FONT_SERIFED), which the heading scores
+# were tuned against, so it is kept as is.
+FLAG_UNDERLINE = 4
+
+# Lines set in a smaller font size (in points) are not extracted
+MIN_FONT_SIZE = 1.0
+
+# Documents longer than this are split into page chunks of this size when an
+# executor is available
+PAGE_CHUNK_SIZE = 25
+
+
+# (is_bold, is_italic) by font name. Documents in a batch tend to share a
+# handful of fonts, so the entries are kept at module level across PDFs.
+_font_styles: Dict[str, Tuple[bool, bool]] = {}
+
+
+def clear_caches():
+    """Drop the module-level font caches."""
+    _font_styles.clear()
+
+
+def _is_centered(bbox, page_center_x: float) -> bool:
+    """Check if a bbox is centered on a page with the given center x."""
+    if not bbox:
+        return False
+    return abs((bbox[0] + bbox[2]) * 0.5 - page_center_x) < 50
 
 
 class PDFLineExtractor:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: Optional[str] = None, data: Optional[bytes] = None):
+        """Open a PDF from disk, or from an in-memory buffer when data is given."""
         self.pdf_path = pdf_path
-        self.doc = fitz.open(pdf_path)
+        if data is not None:
+            self.doc = fitz.open(stream=data, filetype="pdf")
+        else:
+            self.doc = fitz.open(pdf_path)
         self.pdf_lines = []
 
-    def extract_text_lines(self) -> List[Dict[str, Any]]:
-        """Extract text lines with formatting information from all pages of the PDF."""
+    def close(self):
+        """Close the document. Extracted lines stay available."""
+        self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def extract_text_lines(self, executor: Optional[Executor] = None) -> List[Dict[str, Any]]:
+        """Extract text lines with formatting information from all pages of the PDF.
+
+        When an executor is given, long documents opened from a path are
+        extracted in page chunks on it; workers reopen the file from disk.
+        """
+        page_count = self.doc.page_count
+        if executor is not None and self.pdf_path and page_count > PAGE_CHUNK_SIZE:
+            all_lines = extract_page_chunks(self.pdf_path, page_count, executor)
+        else:
+            all_lines = self.extract_range(1, page_count)
+        self.pdf_lines = all_lines
+        return all_lines
+
+    def extract_range(self, first_page: int, last_page: int) -> List[Dict[str, Any]]:
+        """Extract text lines from pages first_page..last_page (1-based, inclusive)."""
         all_lines = []
 
-        for page_num, page in enumerate(self.doc, start=1):
+        font_styles = _font_styles
+        pages = self.doc.pages(first_page - 1, last_page)
+        for page_num, page in enumerate(pages, start=first_page):
             try:
-                blocks = page.get_text("dict")["blocks"]
+                rect = page.rect
+                page_center_x = (rect.x0 + rect.x1) * 0.5
+                textpage = page.get_textpage(flags=TEXTPAGE_FLAGS)
+                blocks = textpage.extractDICT()["blocks"]
+                textpage = None
                 page_lines = []
+                append_line = page_lines.append
 
                 for block in blocks:
-                    if "lines" not in block:
+                    # Only text blocks (type 0) carry lines
+                    if block.get("type", 0) != 0 or "lines" not in block:
                         continue
 
                     for line in block["lines"]:
@@ -27,13 +107,30 @@ class PDFLineExtractor:
                         if not spans:
                             continue
 
-                        # Combine text from all spans in the line
-                        full_text = "".join([span.get("text", "") for span in spans]).strip()
+                        # Combine text from all spans in the line; most lines
+                        # are a single span and need no join
+                        if len(spans) == 1:
+                            full_text = spans[0].get("text", "").strip()
+                        else:
+                            full_text = "".join([span.get("text", "") for span in spans]).strip()
                         if not full_text:
                             continue
 
                         first_span = spans[0]
+
+                        # Invisible text (e.g. hidden OCR layers) is never
+                        # a heading; drop it before building the line
+                        font_size = round(first_span.get("size", 0.0), 2)
+                        if font_size < MIN_FONT_SIZE:
+                            continue
+
                         bbox = self.get_line_bbox(spans)
+                        font = first_span.get("font", "Unknown")
+                        style = font_styles.get(font)
+                        if style is None:
+                            style = font_styles[font] = ("Bold" in font, "Italic" in font)
+                        is_bold, is_italic = style
+                        is_underlined = (first_span.get("flags", 0) & FLAG_UNDERLINE) != 0
 
                         # Calculate spacing from previous line
                         space_above = 0
@@ -44,67 +141,64 @@ class PDFLineExtractor:
                             x0, y0, x1, y1 = bbox
                             prev_line = page_lines[-1] if page_lines else None
                             if prev_line and "bbox" in prev_line:
-                                space_above = round(y0 - prev_line["bbox"][3], 2)
-                                space_below = round(prev_line["bbox"][1] - y1, 2)
+                                space_above = y0 - prev_line["bbox"][3]
+                                space_below = prev_line["bbox"][1] - y1
 
                         line_data = {
                             "text": full_text,
-                            "font_size": round(first_span.get("size", 0.0), 2),
-                            "font": first_span.get("font", "Unknown"),
-                            "is_bold": "Bold" in first_span.get("font", ""),
-                            "is_italic": "Italic" in first_span.get("font", ""),
-                            "is_underlined": first_span.get("flags", 0) & 4 != 0,
-                            "is_center": self.is_centered(line, page.rect),
+                            "font_size": font_size,
+                            "font": font,
+                            "is_bold": is_bold,
+                            "is_italic": is_italic,
+                            "is_underlined": is_underlined,
+                            "is_center": _is_centered(first_span.get("bbox"), page_center_x),
                             "bbox": bbox,
-                            "x0": round(x0, 2),
-                            "y0": round(y0, 2),
-                            "x1": round(x1, 2),
-                            "y1": round(y1, 2),
+                            "x0": x0,
+                            "y0": y0,
+                            "x1": x1,
+                            "y1": y1,
                             "space_above": space_above,
                             "space_below": space_below,
                             "page": page_num
                         }
 
-                        page_lines.append(line_data)
+                        append_line(line_data)
 
                 all_lines.extend(page_lines)
 
             except Exception as e:
                 continue
 
-        self.pdf_lines = all_lines
         return all_lines
 
     def get_line_bbox(self, spans: List[Dict[str, Any]]):
         """Calculate the bounding box for a line from its spans."""
+        # Single pass with running min/max; lines have only a few spans
+        bbox = None
         try:
-            x0 = min([span["bbox"][0] for span in spans if "bbox" in span])
-            y0 = min([span["bbox"][1] for span in spans if "bbox" in span])
-            x1 = max([span["bbox"][2] for span in spans if "bbox" in span])
-            y1 = max([span["bbox"][3] for span in spans if "bbox" in span])
-            return (x0, y0, x1, y1)
+            for span in spans:
+                if "bbox" not in span:
+                    continue
+                sx0, sy0, sx1, sy1 = span["bbox"][:4]
+                if bbox is None:
+                    x0, y0, x1, y1 = bbox = (sx0, sy0, sx1, sy1)
+                    continue
+                if sx0 < x0:
+                    x0 = sx0
+                if sy0 < y0:
+                    y0 = sy0
+                if sx1 > x1:
+                    x1 = sx1
+                if sy1 > y1:
+                    y1 = sy1
         except Exception:
             return None
+        if bbox is None:
+            return None
+        return (x0, y0, x1, y1)
 
-    def is_centered(self, line: Dict[str, Any], rect: fitz.Rect):
-        """Check if a line is centered on the page."""
-        try:
-            spans = line.get("spans", [])
-            if not spans:
-                return False
-            bbox = spans[0].get("bbox", None)
-            if not bbox:
-                return False
-            x0, x1 = bbox[0], bbox[2]
-            center_of_line = (x0 + x1) / 2
-            page_center = (rect.x0 + rect.x1) / 2
-            return abs(center_of_line - page_center) < 50
-        except:
-            return False
-
-    def get_pdf_lines(self, include_metadata=True) -> List[Dict[str, Any]]:
-        """Return extracted lines with optional metadata."""
-        lines = []
+    def get_pdf_lines(self, include_metadata=True) -> Iterator[Dict[str, Any]]:
+        """Yield extracted lines with optional metadata, one copy at a time."""
         for l in self.pdf_lines:
             line = {"text": l["text"], "page": l["page"]}
             if include_metadata:
@@ -122,18 +216,61 @@ class PDFLineExtractor:
                     "space_above": l.get("space_above", 0),
                     "space_below": l.get("space_below", 0),
                 })
-            lines.append(line)
-        return lines
+            yield line
 
     def save_lines_to_file(self, output_path: str, include_metadata: bool = True):
-        """Save extracted lines to a JSON file."""
-        lines = self.get_pdf_lines(include_metadata)
+        """Save extracted lines to a JSON file.
+
+        The array is written one line at a time, so the copies made by
+        get_pdf_lines are never all held in memory at once.
+        """
+        if orjson is not None:
+            indent = "  "
+            def encode(line):
+                return orjson.dumps(line, option=orjson.OPT_INDENT_2).decode("utf-8")
+        else:
+            indent = "    "
+            def encode(line):
+                return json.dumps(line, indent=4)
+
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(lines, f, indent=4)
+            f.write("[")
+            separator = "\n" + indent
+            for line in self.get_pdf_lines(include_metadata):
+                if include_metadata:
+                    # Positions are kept unrounded in memory; round them for output only
+                    for key in ROUNDED_FIELDS:
+                        line[key] = round(line[key], 2)
+                # Nest each encoded line one level into the array
+                f.write(separator)
+                f.write(encode(line).replace("\n", "\n" + indent))
+                separator = ",\n" + indent
+            f.write("\n]" if separator[0] == "," else "]")
+
+
+def extract_page_range(pdf_path: str, first_page: int, last_page: int) -> List[Dict[str, Any]]:
+    """Extract the text lines of pages first_page..last_page of a PDF."""
+    with PDFLineExtractor(pdf_path) as extractor:
+        return extractor.extract_range(first_page, last_page)
+
+
+def extract_page_chunks(pdf_path: str, page_count: int, executor: Executor) -> List[Dict[str, Any]]:
+    """Extract the text lines of all pages of a PDF in chunks on an executor.
+
+    Workers reopen the file from disk, PAGE_CHUNK_SIZE pages each.
+    """
+    # Pages are extracted independently, so the chunks can simply be
+    # concatenated in page order
+    futures = [
+        executor.submit(extract_page_range, pdf_path, first,
+                        min(first + PAGE_CHUNK_SIZE - 1, page_count))
+        for first in range(1, page_count + 1, PAGE_CHUNK_SIZE)
+    ]
+    return list(chain.from_iterable(future.result() for future in futures))
 
 
 if __name__ == "__main__":
     pdf_path = r"pdfs\Dinner Ideas - Mains_1.pdf"
-    extractor = PDFLineExtractor(pdf_path)
-    extractor.extract_text_lines()
+    with PDFLineExtractor(pdf_path) as extractor:
+        extractor.extract_text_lines()
     extractor.save_lines_to_file("Dinner Ideas - Mains_1-new.json")